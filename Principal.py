@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import os
-import seaborn as sns 
+
+from core.agregados import agregados
+
+# matplotlib y seaborn se importan dentro de las funciones que grafican: los
+# KPIs se muestran sin esperar a esas librerias
 
 # configuracion streamlit
 st.set_page_config(page_title="Dashboard Academico", layout="wide")
@@ -11,22 +13,15 @@ st.set_page_config(page_title="Dashboard Academico", layout="wide")
 # carga de datos
 @st.cache_data
 def cargar_datos():
-    folder = "datasets"
-    est  = pd.read_csv(os.path.join(folder, "estudiantes.csv"))
-    rend = pd.read_csv(os.path.join(folder, "rendimiento.csv"))
-    obs  = pd.read_csv(os.path.join(folder, "observaciones.csv"))
+    # agregados compartidos con las demas paginas y el build
+    ag = agregados()
+    est = ag["est"]
 
     # nota y asistencia
-    periodos = ["P1", "P2", "P3", "P4"]
-    rend["nota"] = rend["CF"].fillna(rend[periodos].mean(axis=1))
-    stats = rend.groupby("id_estudiante").agg(
-        nota_promedio=("nota", "mean"),
-        asistencia=("asistencia", "mean")
-        
-    ).reset_index()
+    stats = ag["por_estudiante"][["id_estudiante", "nota_promedio", "asistencia"]]
 
     # cantidad de observaciones
-    obs_count = obs["id_estudiante"].value_counts().reset_index()
+    obs_count = ag["obs"]["id_estudiante"].value_counts().reset_index()
     obs_count.columns = ["id_estudiante", "n_observaciones"]
 
     df = est.merge(stats, on="id_estudiante", how="left")\
@@ -48,25 +43,38 @@ col3.metric("✅ Asistencia Porcentual (%)", f"{(df['asistencia'].mean()):.1%}")
 col4.metric("📝 Observaciones Totales", df["n_observaciones"].sum())
 
 # graficos generalizados de estudiantes
-col1, col2 = st.columns(2)
+def grafico_notas(df):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-with col1:
-   
     plt.style.use("ggplot") # le agregamos un estilo a los graficos
-    st.subheader("📊 Distribucion de notas")
     fig, ax = plt.subplots(figsize=(4, 4))
     sns.barplot(data=df, y= "nota_promedio", x= "Periodos", color= "skyblue", alpha= 0.9, ax= ax, errorbar= None)
     ax.set_xlabel("Nota promedio")
     ax.set_ylabel("Estudiantes")
-    st.pyplot(fig)
+    return fig
+
+
+def grafico_asistencia(df):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-with col2:
-    st.subheader("📈 Asistencia vs Nota")
     fig, ax = plt.subplots(figsize=(4, 4))
     sns.scatterplot(x= 'asistencia', y= 'nota_promedio', hue= "genero", color= ['teal', 'blue'], ax= ax, data= df)
     ax.set_xlabel("Asistencia (%)")
     ax.set_ylabel("Nota promedio")
-    st.pyplot(fig)
+    return fig
+
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("📊 Distribucion de notas")
+    st.pyplot(grafico_notas(df))
+
+with col2:
+    st.subheader("📈 Asistencia vs Nota")
+    st.pyplot(grafico_asistencia(df))
 
 # tabla resumen
 st.subheader("📋 Resumen Por Estudiante")
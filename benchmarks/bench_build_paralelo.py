@@ -0,0 +1,40 @@
+# benchmarks/bench_build_paralelo.py
+#
+# build_many sobre varios periodos de dos escuelas sinteticas (cada una con
+# su carpeta de datasets), secuencial (procesos=1) contra el pool de
+# procesos, sin modelo NLP y dentro de una carpeta temporal. Cada modo parte
+# de processed/ vacio (build completo).
+#
+#   python -m benchmarks.bench_build_paralelo [estudiantes] [procesos]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_build_streaming import datasets_sinteticos
+from core.build_paralelo import build_many
+
+PERIODOS = [("2022-2023", 1), ("2022-2023", 2), ("2023-2024", 1), ("2023-2024", 2)]
+
+
+def main(estudiantes=10_000, procesos=0):
+    with tempfile.TemporaryDirectory() as tmp:
+        bases = [os.path.join(tmp, f"escuela_{i}") for i in (1, 2)]
+        for i, base in enumerate(bases):
+            datasets_sinteticos(base, estudiantes, semilla=i)
+        print(f"{len(bases)} escuelas x {len(PERIODOS)} periodos, {estudiantes} estudiantes por escuela")
+
+        for nombre, n in [("secuencial", 1), ("pool", procesos or None)]:
+            for base in bases:
+                for carpeta in ("processed", "master"):
+                    shutil.rmtree(os.path.join(base, carpeta), ignore_errors=True)
+            t = time.perf_counter()
+            resultados = build_many(PERIODOS, bases, con_modelo=False, procesos=n)
+            pids = len({r["pid"] for r in resultados})
+            print(f"{nombre:12s} {time.perf_counter() - t:7.2f} s  ({pids} procesos)")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,92 @@
+# benchmarks/bench_build_streaming.py
+#
+# Memoria maxima (RSS) y tiempo del build del master en memoria contra el
+# build por bloques (core.build_streaming) sobre datasets sinteticos grandes.
+# Cada paso corre en su propio proceso (ru_maxrss se hereda a traves de exec,
+# asi que ni los datos sinteticos se generan en el proceso padre), sin modelo
+# NLP y dentro de una carpeta temporal con su propio datasets/.
+#
+#   python -m benchmarks.bench_build_streaming [estudiantes] [chunksize]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_data_loader import rendimiento_sintetico
+
+FRASES = [
+    "Participa en clase", "Entrega tareas a tiempo", "Se distrae con el celular",
+    "Lidera trabajos grupales", "Ausencias recurrentes", "Disfruta los experimentos",
+    "Resuelve problemas de lógica", "Escribe cuentos cortos", "Mejoró asistencia",
+]
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def datasets_sinteticos(base, estudiantes, semilla=0):
+    rng = np.random.default_rng(semilla)
+    os.makedirs(base)
+    pd.DataFrame({
+        "id_estudiante": np.arange(1, estudiantes + 1),
+        "nombre_estudiante": [f"Estudiante {i}" for i in range(1, estudiantes + 1)],
+        "edad": rng.integers(14, 19, estudiantes),
+        "genero": rng.choice(["F", "M"], estudiantes),
+        "semestre_actual": rng.integers(1, 3, estudiantes),
+        "estado_academico": "activo",
+    }).to_csv(os.path.join(base, "estudiantes.csv"), index=False)
+
+    # ~20 registros de rendimiento y ~10 observaciones por estudiante
+    rendimiento_sintetico(estudiantes * 20, semilla).to_csv(
+        os.path.join(base, "rendimiento.csv"), index=False
+    )
+    n = estudiantes * 10
+    pd.DataFrame({
+        "id_observacion": np.arange(1, n + 1),
+        "id_estudiante": rng.integers(1, estudiantes + 1, n),
+        "fecha": "2025-08-10",
+        "autor": "Prof. Martínez",
+        "observacion": [
+            " ".join(rng.choice(FRASES, 3)) for _ in range(n)
+        ],
+    }).to_csv(os.path.join(base, "observaciones.csv"), index=False)
+
+
+def _hijo(codigo, cwd):
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", f"import benchmarks.bench_build_streaming as b; b.{codigo}"],
+        cwd=cwd, env={**os.environ, "PYTHONPATH": REPO},
+        capture_output=True, text=True, check=True,
+    )
+    return out.stdout
+
+
+def _medir(chunksize):
+    # corre dentro del proceso hijo, con cwd en la carpeta temporal
+    import resource
+    import time
+
+    from core.build_dataset import build_master_dataset
+
+    t = time.perf_counter()
+    build_master_dataset("2020-2021", 1, chunksize=chunksize or None)
+    segundos = time.perf_counter() - t
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{segundos:.2f} {rss:.1f}")
+
+
+def main(estudiantes=50_000, chunksize=20_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        _hijo(f"datasets_sinteticos('datasets', {estudiantes})", tmp)
+        print(f"{estudiantes} estudiantes, {estudiantes * 20} registros de rendimiento, "
+              f"{estudiantes * 10} observaciones")
+
+        for nombre, cs in [("en memoria", 0), (f"por bloques ({chunksize})", chunksize)]:
+            segundos, rss = _hijo(f"_medir({cs})", tmp).split()[-2:]
+            print(f"{nombre:24s} {float(segundos):7.2f} s  {float(rss):8.1f} MiB pico")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
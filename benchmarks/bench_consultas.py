@@ -0,0 +1,52 @@
+# benchmarks/bench_consultas.py
+#
+# Consulta puntual de las paginas (registros de un estudiante, de una
+# asignatura) sobre rendimiento.csv sintetico de distintos tamaños:
+# consultar con BACKEND "csv" (mascara sobre el DataFrame en memoria, que
+# primero hay que cargar) contra "sqlite" (indice, sin cargar el historial).
+# Con el indice el tiempo depende de las filas devueltas, no del historial;
+# devolver muchas filas (una asignatura entera) es mas caro que la mascara.
+#
+#   python -m benchmarks.bench_consultas [filas...]
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_data_loader import rendimiento_sintetico
+from core import data_loader, sql_store
+
+REPETICIONES = 20
+
+
+def _medir(fn):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        t = time.perf_counter()
+        fn()
+        mejor = min(mejor, time.perf_counter() - t)
+    return mejor * 1000
+
+
+def main(*tamanios):
+    print(f"{'filas':>10} {'consulta':>12} {'csv ms':>9} {'sqlite ms':>10}")
+    for n in tamanios or (100_000, 1_000_000):
+        with tempfile.TemporaryDirectory() as base:
+            rendimiento_sintetico(n).to_csv(os.path.join(base, "rendimiento.csv"), index=False)
+            sql_store.importar(base, ["rendimiento.csv"])
+            data_loader.BACKEND = "csv"
+            t = time.perf_counter()
+            data_loader.consultar("rendimiento.csv", base, id_estudiante=0)
+            print(f"{n:>10} {'carga csv':>12} {(time.perf_counter() - t) * 1000:>9.2f}")
+
+            for nombre, col, valor in [("estudiante", "id_estudiante", 7), ("asignatura", "asignatura", "Filosofía")]:
+                tiempos = []
+                for backend in ("csv", "sqlite"):
+                    data_loader.BACKEND = backend
+                    tiempos.append(_medir(lambda: data_loader.consultar("rendimiento.csv", base, **{col: valor})))
+                print(f"{n:>10} {nombre:>12} {tiempos[0]:>9.2f} {tiempos[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,68 @@
+# benchmarks/bench_data_loader.py
+#
+# Carga de un rendimiento.csv multi-año sintetico: pd.read_csv contra
+# load_csv (primera vez, que genera la cache, y siguientes) y memoria del
+# DataFrame resultante.
+#
+#   python -m benchmarks.bench_data_loader [filas]
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.data_loader import _formato_cache, load_csv
+
+ASIGNATURAS = [
+    "Lengua y Literatura", "Inglés", "Matemática", "Ciencias de la Naturaleza",
+    "Ciencias Sociales", "Educación Física", "Educación Artística", "Informática",
+    "Filosofía",
+]
+
+
+def rendimiento_sintetico(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    notas = lambda: rng.integers(40, 101, n).astype(float)
+    anio = rng.integers(2015, 2026, n)
+    return pd.DataFrame({
+        "id_estudiante": rng.integers(1, n // 20 + 2, n),
+        "año_academico": [f"{a}-{a + 1}" for a in anio],
+        "semestre": rng.integers(1, 3, n),
+        "asignatura": rng.choice(ASIGNATURAS, n),
+        "aula": rng.choice([f"Aula {i}" for i in range(1, 31)], n),
+        "P1": notas(), "P2": notas(), "P3": notas(), "P4": notas(),
+        "CF": np.round(rng.uniform(40, 100, n), 1),
+        "asistencia": np.round(rng.uniform(50, 100, n), 1),
+    })
+
+
+def cronometrar(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def main(n=1_000_000):
+    with tempfile.TemporaryDirectory() as base:
+        path = os.path.join(base, "rendimiento.csv")
+        rendimiento_sintetico(n).to_csv(path, index=False)
+
+        df_csv, t_csv = cronometrar(lambda: pd.read_csv(path))
+        _, t_frio = cronometrar(lambda: load_csv("rendimiento.csv", base))
+        df_cache, t_cache = cronometrar(lambda: load_csv("rendimiento.csv", base))
+
+        mem_csv = df_csv.memory_usage(deep=True).sum() / 2**20
+        mem_cache = df_cache.memory_usage(deep=True).sum() / 2**20
+
+        print(f"{n} filas, cache en {_formato_cache()}")
+        print(f"pd.read_csv           {t_csv:7.3f} s  {mem_csv:8.1f} MiB")
+        print(f"load_csv (genera)     {t_frio:7.3f} s")
+        print(f"load_csv (cache)      {t_cache:7.3f} s  {mem_cache:8.1f} MiB"
+              f"  ({t_csv / t_cache:.0f}x, {mem_csv / mem_cache:.0f}x menos memoria)")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,166 @@
+# benchmarks/bench_import.py
+#
+# Tiempo de importacion (en frio, proceso nuevo) de los modulos de core y de
+# los imports de nivel superior de cada pagina de streamlit, comparado contra
+# un presupuesto. Sale con codigo 1 si alguno se pasa. Informa tambien el
+# tiempo de la pagina completa (el script entero, con streamlit sin servidor)
+# y las librerias pesadas que carga.
+#
+#   python -m benchmarks.bench_import
+
+import ast
+import glob
+import importlib.util
+import json
+import re
+import subprocess
+import sys
+
+# presupuesto en segundos, medido con python -X importtime
+PRESUPUESTO = {
+    "core.nlp": 0.25,
+    "core.build_dataset": 0.80,
+}
+
+# librerias que no deben cargarse solo por importar el modulo
+PROHIBIDAS = {
+    "core.nlp": ["sklearn", "scipy", "nltk", "pandas"],
+    "core.build_dataset": ["sklearn", "nltk"],
+}
+
+
+def medir(modulo, repeticiones=5):
+    # minimo de varias corridas: el primer proceso paga la cache de disco
+    mejor = None
+    cargados = set()
+    for _ in range(repeticiones):
+        r = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            capture_output=True, text=True, check=True,
+        )
+        total = None
+        for linea in r.stderr.splitlines():
+            m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", linea)
+            if not m:
+                continue
+            if m.group(3) == modulo:
+                total = int(m.group(1)) / 1e6
+            cargados.add(m.group(3).split(".")[0])
+        if total is None:
+            raise RuntimeError(f"-X importtime no informo {modulo}")
+        mejor = total if mejor is None else min(mejor, total)
+    return mejor, cargados
+
+
+# paginas: cuentan los imports de la cabecera del archivo, lo que se paga
+# antes de dibujar el primer elemento; streamlit ya esta cargado en el servidor
+PAGINAS = ["Principal.py"] + sorted(glob.glob("pages/*.py"))
+PRESUPUESTO_PAGINA = 0.80
+PROHIBIDAS_PAGINA = ["matplotlib", "seaborn", "sklearn", "torch", "sentence_transformers"]
+
+_MEDIR_PAGINA = """
+import json, sys, time
+try:
+    import streamlit
+except ImportError:
+    pass
+antes = set(sys.modules)
+t = time.perf_counter()
+exec(compile(sys.argv[1], sys.argv[2], "exec"))
+t = time.perf_counter() - t
+nuevos = sorted({m.split(".")[0] for m in set(sys.modules) - antes})
+print(json.dumps({"t": t, "cargados": nuevos}))
+"""
+
+# pagina completa: el script entero en el modo sin servidor de streamlit
+# (los botones devuelven False, los selectbox su primera opcion)
+_MEDIR_PAGINA_COMPLETA = """
+import json, logging, runpy, sys, time
+import streamlit
+logging.disable(logging.WARNING)
+antes = set(sys.modules)
+t = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+t = time.perf_counter() - t
+nuevos = sorted({m.split(".")[0] for m in set(sys.modules) - antes})
+print(json.dumps({"t": t, "cargados": nuevos}))
+"""
+
+
+def imports_pagina(path):
+    # imports hasta la primera sentencia que no lo sea, sin los de streamlit
+    with open(path, encoding="utf-8") as f:
+        arbol = ast.parse(f.read(), filename=path)
+    nodos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            nombres = [a.name for a in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres = [nodo.module]
+        else:
+            break
+        if all(n.split(".")[0] == "streamlit" for n in nombres):
+            continue
+        nodos.append(nodo)
+    return ast.unparse(ast.Module(body=nodos, type_ignores=[]))
+
+
+def medir_pagina(path, repeticiones=5, completa=False):
+    # la pagina completa puede fallar (datos o modelos que faltan): se
+    # informa el error en vez de cortar el benchmark
+    args = [_MEDIR_PAGINA_COMPLETA, path] if completa else [_MEDIR_PAGINA, imports_pagina(path), path]
+    mejor = None
+    cargados = set()
+    for _ in range(repeticiones):
+        r = subprocess.run(
+            [sys.executable, "-c", *args],
+            capture_output=True, text=True, check=not completa,
+        )
+        if r.returncode:
+            raise RuntimeError(r.stderr.strip().splitlines()[-1])
+        datos = json.loads(r.stdout.strip().splitlines()[-1])
+        mejor = datos["t"] if mejor is None else min(mejor, datos["t"])
+        cargados.update(datos["cargados"])
+    return mejor, cargados
+
+
+def _reportar(nombre, t, limite, extra):
+    estado = "OK" if t <= limite and not extra else "EXCEDE"
+    print(f"{nombre:42s} {t * 1e3:8.1f} ms  (presupuesto {limite * 1e3:.0f} ms)  {estado}")
+    if extra:
+        print(f"{'':42s} importa al cargar: {', '.join(extra)}")
+    return estado == "OK"
+
+
+def main():
+    ok = True
+    for modulo, limite in PRESUPUESTO.items():
+        t, cargados = medir(modulo)
+        extra = [p for p in PROHIBIDAS.get(modulo, []) if p in cargados]
+        ok &= _reportar(modulo, t, limite, extra)
+
+    print()
+    for pagina in PAGINAS:
+        t, cargados = medir_pagina(pagina)
+        extra = [p for p in PROHIBIDAS_PAGINA if p in cargados]
+        ok &= _reportar(pagina, t, PRESUPUESTO_PAGINA, extra)
+
+    print()
+    if importlib.util.find_spec("streamlit") is None:
+        print("pagina completa: requiere streamlit, no se mide")
+        return 0 if ok else 1
+    # informativo: incluye leer los datos y cargar los modelos que use
+    print("pagina completa:")
+    for pagina in PAGINAS:
+        try:
+            t, cargados = medir_pagina(pagina, repeticiones=3, completa=True)
+        except RuntimeError as e:
+            print(f"{pagina:42s} error: {e}")
+            continue
+        pesadas = [p for p in PROHIBIDAS_PAGINA if p in cargados]
+        print(f"{pagina:42s} {t * 1e3:8.1f} ms  carga: {', '.join(pesadas) or '-'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
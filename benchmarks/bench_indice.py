@@ -0,0 +1,61 @@
+# benchmarks/bench_indice.py
+#
+# Recall@5 y latencia del indice IVF contra la busqueda exacta, sobre un
+# catalogo sintetico de vectores normalizados con estructura de clusters
+# (parecida a la de carreras agrupadas por area).
+#
+#   python -m benchmarks.bench_indice [n_areas] [n_consultas]
+
+import sys
+import time
+
+import numpy as np
+
+from core.vector_index import IndiceExacto, IndiceIVF, _normalizar
+
+DIM = 384
+K = 5
+
+
+def catalogo_sintetico(n, n_consultas, n_temas=200, ruido=0.6, semilla=0):
+    rng = np.random.default_rng(semilla)
+    temas = _normalizar(rng.standard_normal((n_temas, DIM)))
+    vecs = _normalizar(temas[rng.integers(n_temas, size=n)] + ruido * _normalizar(rng.standard_normal((n, DIM))))
+    consultas = _normalizar(
+        temas[rng.integers(n_temas, size=n_consultas)] + ruido * _normalizar(rng.standard_normal((n_consultas, DIM)))
+    )
+    return vecs, consultas
+
+
+def cronometrar(fn, *args, **kwargs):
+    t = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t
+
+
+def main(n=30_000, n_consultas=500):
+    vecs, consultas = catalogo_sintetico(n, n_consultas)
+
+    exacto = IndiceExacto(vecs)
+    (ids_ref, _), t_exacto = cronometrar(exacto.buscar, consultas, K)
+    # una consulta a la vez, como en recomendar_areas
+    _, t_exacto_1 = cronometrar(lambda: [exacto.buscar(q, K) for q in consultas])
+
+    ivf, t_build = cronometrar(IndiceIVF().construir, vecs)
+    print(f"catalogo: {n} vectores de {DIM} dims, {n_consultas} consultas, {ivf.n_listas} listas")
+    print(f"construccion IVF: {t_build:.2f} s")
+    print(f"{'modo':14s} {'recall@5':>9s} {'ms/consulta':>12s}")
+    print(f"{'exacto':14s} {1.0:9.3f} {t_exacto_1 / n_consultas * 1e3:12.3f}"
+          f"   (lote: {t_exacto / n_consultas * 1e3:.3f})")
+
+    for nprobe in (1, 2, 4, 8, 16, 32):
+        if nprobe > ivf.n_listas:
+            break
+        (ids, _), t = cronometrar(ivf.buscar, consultas, K, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(ids, ids_ref)])
+        print(f"{'ivf nprobe=' + str(nprobe):14s} {recall:9.3f} {t / n_consultas * 1e3:12.3f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,56 @@
+# benchmarks/bench_indice_estudiantes.py
+#
+# Busquedas de la pagina de estudiantes (registros de un estudiante, de una
+# asignatura y su promedio) con mascaras sobre el DataFrame contra
+# IndiceEstudiantes, y lo que cuesta armar el indice una vez.
+#
+#   python -m benchmarks.bench_indice_estudiantes [filas]
+
+import sys
+import time
+
+from benchmarks.bench_data_loader import rendimiento_sintetico
+from core.indice_estudiantes import IndiceEstudiantes
+
+REPETICIONES = 20
+
+
+def _medir(fn):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        t = time.perf_counter()
+        fn()
+        mejor = min(mejor, time.perf_counter() - t)
+    return mejor * 1000
+
+
+def main(n=1_000_000):
+    df = rendimiento_sintetico(n).rename(columns={"CF": "nota"})
+    df["nombre_estudiante"] = "Estudiante " + df["id_estudiante"].astype(str)
+    df["asignatura"] = df["asignatura"].astype("category")
+
+    t = time.perf_counter()
+    indice = IndiceEstudiantes(df)
+    print(f"{n} filas, indice armado en {(time.perf_counter() - t) * 1000:.0f} ms")
+
+    casos = [
+        ("estudiante",
+         lambda: df[df["id_estudiante"] == 7],
+         lambda: indice.registros_estudiante(7)),
+        ("nombre -> id",
+         lambda: df[df["nombre_estudiante"] == "Estudiante 7"]["id_estudiante"].iloc[0],
+         lambda: indice.id_por_nombre("Estudiante 7")),
+        ("asignatura",
+         lambda: df[df["asignatura"].str.contains("Filosofía", case=False, na=False)],
+         lambda: indice.registros_asignatura("Filosofía")),
+        ("promedio asignatura",
+         lambda: df.loc[df["asignatura"] == "Filosofía", "nota"].mean(),
+         lambda: indice.promedio_asignatura("Filosofía")),
+    ]
+    print(f"{'busqueda':>20} {'mascara ms':>11} {'indice ms':>10}")
+    for nombre, mascara, con_indice in casos:
+        print(f"{nombre:>20} {_medir(mascara):>11.3f} {_medir(con_indice):>10.3f}")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]])
@@ -0,0 +1,62 @@
+# benchmarks/bench_lexico.py
+#
+# Compara extraer_features (una pasada con core.lexico) contra el bucle
+# original de texto.count sobre el corpus de entrenamiento.
+#
+#   python -m benchmarks.bench_lexico
+
+import time
+
+import pandas as pd
+
+from core.config import PALABRAS_POS, PALABRAS_NEG
+from core.nlp import extraer_features, limpiar_texto
+
+CORPUS = "datasets/nlp_observaciones_entrenamiento.csv"
+
+
+def extraer_features_count(texto):
+    # implementacion original, una llamada a str.count por palabra
+    texto = texto.lower()
+    feats = {}
+    for p in PALABRAS_POS:
+        feats[f"pos_{p}"] = texto.count(p)
+    for n in PALABRAS_NEG:
+        feats[f"neg_{n}"] = texto.count(n)
+    feats["longitud"] = len(texto)
+    feats["num_palabras"] = len(texto.split())
+    feats["ratio_neg"] = sum(feats[f"neg_{n}"] for n in PALABRAS_NEG) / (feats["num_palabras"] + 1)
+    return feats
+
+
+def _medir(fn, textos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for t in textos:
+            fn(t)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main(repeticiones=5):
+    textos = pd.read_csv(CORPUS)["texto"].astype(str).apply(limpiar_texto).tolist()
+    # el corpus real es de frases cortas; tambien se mide con historiales largos
+    largos = [" ".join(textos[i:i + 20]) for i in range(0, len(textos), 20)]
+
+    for nombre, corpus in [("corpus", textos), ("historiales x20", largos)]:
+        for t in corpus:
+            assert extraer_features(t) == extraer_features_count(t)
+
+        t_count = _medir(extraer_features_count, corpus, repeticiones)
+        t_lex = _medir(extraer_features, corpus, repeticiones)
+        print(
+            f"{nombre:16s} {len(corpus):5d} textos | "
+            f"str.count {t_count * 1e3:8.2f} ms | "
+            f"lexico {t_lex * 1e3:8.2f} ms | "
+            f"x{t_count / t_lex:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_modo_cpu.py
+#
+# Chequeo de precision del modo CPU de semantic_matcher: compara el top-5 de
+# areas de cada estudiante del dataset maestro con modelo cuantizado y/o
+# vectores float16/int8 contra el modelo completo en float32. Informa
+# tambien la latencia de encode y el tamaño de la matriz de areas. Sale con
+# codigo 1 si algun modo baja del umbral de coincidencia.
+#
+#   python -m benchmarks.bench_modo_cpu [max_estudiantes] [hilos]
+
+import sys
+import time
+
+import numpy as np
+
+from core.data_loader import load_areas, load_master
+from core.perfil_textual import generar_perfil_textual
+from core.semantic_matcher import cargar_modelo, preparar_areas
+from core.vector_index import IndiceExacto, cuantizar
+
+K = 5
+# fraccion media del top-5 de referencia que debe conservarse
+UMBRAL = 0.90
+
+MODOS = [
+    ("fp32", "float16"),
+    ("fp32", "int8"),
+    ("int8", "float32"),
+    ("int8", "float16"),
+    ("int8", "int8"),
+]
+
+
+def codificar(model, textos):
+    t = time.perf_counter()
+    vecs = model.encode(textos, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vecs, dtype=np.float32), time.perf_counter() - t
+
+
+def top_k(areas_vecs, perfiles_vecs, formato):
+    datos, escala = cuantizar(areas_vecs, formato)
+    ids, _ = IndiceExacto(datos, escala).buscar(perfiles_vecs, K)
+    return ids, datos.nbytes + (0 if escala is None else escala.nbytes)
+
+
+def main(max_estudiantes=500, hilos=0):
+    df = load_master().head(max_estudiantes)
+    perfiles = [generar_perfil_textual(row) for _, row in df.iterrows()]
+    textos_areas = preparar_areas(load_areas())["texto_area"].astype(str).tolist()
+
+    vecs = {}
+    tiempos = {}
+    for modelo in ("fp32", "int8"):
+        model = cargar_modelo(int8=modelo == "int8", hilos=hilos)
+        codificar(model, perfiles[:8])  # calentamiento
+        vecs[modelo] = (codificar(model, textos_areas)[0], *codificar(model, perfiles))
+        tiempos[modelo] = vecs[modelo][2]
+        del model
+
+    areas_ref, perfiles_ref, _ = vecs["fp32"]
+    ref, bytes_ref = top_k(areas_ref, perfiles_ref, "float32")
+
+    print(f"{len(perfiles)} perfiles, {len(textos_areas)} areas, top-{K}")
+    print(f"encode perfiles: fp32 {tiempos['fp32']:.2f} s, int8 {tiempos['int8']:.2f} s "
+          f"({tiempos['fp32'] / tiempos['int8']:.1f}x)")
+    print(f"{'modelo':7s} {'vectores':9s} {'coincid@5':>10s} {'top-1':>7s} {'bytes areas':>12s}")
+    print(f"{'fp32':7s} {'float32':9s} {1.0:10.3f} {1.0:7.3f} {bytes_ref:12d}")
+
+    ok = True
+    for modelo, formato in MODOS:
+        areas_vecs, perfiles_vecs, _ = vecs[modelo]
+        ids, nbytes = top_k(areas_vecs, perfiles_vecs, formato)
+        coincidencia = np.mean([len(set(a) & set(b)) / K for a, b in zip(ids, ref)])
+        top1 = np.mean(ids[:, 0] == ref[:, 0])
+        ok &= coincidencia >= UMBRAL
+        print(f"{modelo:7s} {formato:9s} {coincidencia:10.3f} {top1:7.3f} {nbytes:12d}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(main(*args))
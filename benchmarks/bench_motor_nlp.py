@@ -0,0 +1,70 @@
+# benchmarks/bench_motor_nlp.py
+#
+# Motor actual (TF-IDF + LinearSVC calibrado) contra el motor online
+# (hashing + SGD): tiempo de entrenamiento, de actualizacion con filas nuevas
+# y calidad del puntaje sobre una particion de prueba.
+#
+#   python -m benchmarks.bench_motor_nlp
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+import core.nlp as nlp
+from core.nlp import puntaje_ambiente_batch
+from core.nlp_online import TRAIN_PATH, entrenar_modelo_online
+
+
+def _metricas(modelo, textos, y):
+    p = puntaje_ambiente_batch(textos, modelo)
+    return roc_auc_score(y, p), brier_score_loss(y, p), log_loss(y, np.clip(p, 1e-6, 1 - 1e-6))
+
+
+def main(semilla=0):
+    df = pd.read_csv(TRAIN_PATH)
+    train, test = train_test_split(df, test_size=0.25, stratify=df["label"], random_state=semilla)
+    # 80% como historico y 20% como filas "recien etiquetadas"
+    hist, nuevos = train_test_split(train, test_size=0.2, stratify=train["label"], random_state=semilla)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = {}
+        for nombre, parte in [("train", train), ("hist", hist), ("nuevos", nuevos)]:
+            rutas[nombre] = os.path.join(tmp, f"{nombre}.csv")
+            parte.to_csv(rutas[nombre], index=False)
+
+        t0 = time.perf_counter()
+        svm = nlp.entrenar_modelo_nlp(rutas["train"])
+        t_svm = time.perf_counter() - t0
+        # incorporar filas nuevas = volver a ajustar todo el corpus
+        t_svm_upd = t_svm
+
+        t0 = time.perf_counter()
+        online = entrenar_modelo_online(rutas["train"])
+        t_online = time.perf_counter() - t0
+
+        online_inc = entrenar_modelo_online(rutas["hist"])
+        t0 = time.perf_counter()
+        online_inc = entrenar_modelo_online(rutas["nuevos"], epocas=1, modelo_nlp=online_inc)
+        t_online_upd = time.perf_counter() - t0
+
+    textos, y = test["texto"].tolist(), test["label"].to_numpy()
+    print(f"train {len(train)} filas | test {len(test)} filas | nuevas {len(nuevos)} filas\n")
+    print(f"{'motor':28s} {'entrenar':>10s} {'actualizar':>11s} {'AUC':>7s} {'Brier':>7s} {'logloss':>8s}")
+    for nombre, modelo, t, t_upd in [
+        ("tfidf + svm calibrado", svm, t_svm, t_svm_upd),
+        ("hashing + sgd", online, t_online, None),
+        ("hashing + sgd incremental", online_inc, None, t_online_upd),
+    ]:
+        auc, brier, ll = _metricas(modelo, textos, y)
+        ft = f"{t * 1e3:8.0f}ms" if t is not None else f"{'-':>10s}"
+        fu = f"{t_upd * 1e3:9.0f}ms" if t_upd is not None else f"{'-':>11s}"
+        print(f"{nombre:28s} {ft} {fu} {auc:7.3f} {brier:7.3f} {ll:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# core/agregados.py
+#
+# Agregados de rendimiento y observaciones compartidos por las paginas y por
+# build_master_dataset. Se calculan una vez por version de los datos (mtime y
+# tamaño de los CSV) y quedan en un lru_cache acotado, asi que abrir varias
+# paginas lee y agrupa los archivos una sola vez por proceso.
+#
+# Los DataFrames devueltos son compartidos entre llamadas: quien necesite
+# modificarlos trabaja sobre una copia.
+
+import os
+from functools import lru_cache
+
+from core.data_loader import DATASET, en_memoria, firma_archivo
+
+PERIODOS = ["P1", "P2", "P3", "P4"]
+ARCHIVOS = ("estudiantes.csv", "rendimiento.csv", "observaciones.csv")
+
+
+def nota_canonica(rend):
+    # nota de cada registro: CF y, si falta, el promedio de los parciales
+    return rend["CF"].fillna(rend[PERIODOS].mean(axis=1))
+
+
+def version_datos(base=DATASET):
+    return tuple(
+        (nombre, tuple(firma_archivo(os.path.join(base, nombre)).values()))
+        for nombre in ARCHIVOS
+    )
+
+
+@lru_cache(maxsize=4)
+def _datos(version, base):
+    # los mismos DataFrames que data_loader.consultar; assign no copia las
+    # columnas (copy-on-write), rend solo suma la columna nota
+    est = en_memoria("estudiantes.csv", base)
+    rend = en_memoria("rendimiento.csv", base)
+    obs = en_memoria("observaciones.csv", base)
+    return est, rend.assign(nota=nota_canonica(rend)), obs
+
+
+@lru_cache(maxsize=16)
+def _agregados(version, base, anio_academico, semestre):
+    est, rend, obs = _datos(version, base)
+    if anio_academico is not None:
+        rend = rend[
+            (rend["año_academico"] == anio_academico) &
+            (rend["semestre"] == semestre)
+        ]
+
+    por_estudiante = (
+        rend.groupby("id_estudiante")
+        .agg(
+            nota_promedio=("nota", "mean"),
+            asistencia=("asistencia", "mean"),
+            var_nota=("nota", "std") # desviacion estandar como varianza
+        )
+        .reset_index()
+    )
+    por_estudiante["var_nota"] = por_estudiante["var_nota"].fillna(0)
+
+    por_asignatura = (
+        rend.groupby(["id_estudiante", "asignatura"], observed=True)
+        .agg(nota=("nota", "mean"), asistencia=("asistencia", "mean"))
+        .reset_index()
+    )
+
+    # lista de observaciones por estudiante, en el orden del CSV
+    observaciones = (
+        obs.groupby("id_estudiante")["observacion"]
+        .apply(list)
+        .reset_index()
+    )
+
+    return {
+        "est": est,
+        "rend": rend,
+        "obs": obs,
+        "por_estudiante": por_estudiante,
+        "por_asignatura": por_asignatura,
+        "observaciones": observaciones,
+    }
+
+
+def agregados(anio_academico=None, semestre=None, base=DATASET):
+    """
+    Datos base y agregados para un periodo (o todos si anio_academico es None).
+
+    Claves: est, rend (con la columna nota), obs, por_estudiante
+    (nota_promedio, asistencia, var_nota), por_asignatura (nota y asistencia
+    por estudiante y asignatura) y observaciones (lista por estudiante).
+    """
+    return dict(_agregados(version_datos(base), base, anio_academico, semestre))
@@ -1,34 +1,61 @@
 # core/build_dataset.py
 
+import hashlib
+import io
+import json
 import os
+import logging
+import time
 import pandas as pd
 import numpy as np
 
-from core.data_loader import load_base_data
+from core.agregados import agregados
+from core.contexto_store import leer_contexto
+from core.data_loader import load_areas
+from core.master_store import MASTER_DIR, guardar_particion, ruta_particion
+from core.score_cache import CachePuntajes, huella_modelo
 from core.nlp import (
-    puntaje_ambiente,
     limpiar_texto,
     quitar_acentos,
-    score_keywords
+    SCORER_CIENCIA,
+    SCORER_NUMERO,
+    SCORER_SOCIAL,
 )
-from core.config import (
-    PALABRAS_CIENCIA,
-    PALABRAS_NUMERO,
-    PALABRAS_SOCIAL,
-    MODIFICADORES
-)
-from core.models_riesgo import calcular_riesgo
+from core.models_riesgo import calcular_riesgo_frame
 
 # Paths
 
 BASE_PATH = "datasets"
 RAW_PATH = f"{BASE_PATH}"
 PROC_PATH = f"{BASE_PATH}/processed"
-MASTER_PATH = f"{BASE_PATH}/master"
+MASTER_PATH = MASTER_DIR
 
 os.makedirs(PROC_PATH, exist_ok=True)
 os.makedirs(MASTER_PATH, exist_ok=True)
 
+
+def rutas(base=BASE_PATH):
+    # carpetas de un conjunto de datasets (p.ej. una escuela): crudos,
+    # procesados y master; con base por defecto son RAW/PROC/MASTER_PATH
+    if base == BASE_PATH:
+        return RAW_PATH, PROC_PATH, MASTER_PATH
+    return base, os.path.join(base, "processed"), os.path.join(base, "master")
+
+
+def escribir_csv(df, path, huella=False):
+    # archivo completo o nada: otro build en paralelo puede estar leyendolo;
+    # con huella devuelve el hash de lo escrito (no de lo que haya despues)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    h = None
+    if huella:
+        with open(tmp, "rb") as f:
+            h = _hash_bytes(f.read())
+    os.replace(tmp, path)
+    return h
+
+log = logging.getLogger(__name__)
+
 # Helpers
 
 def calc_scores(obs_list):
@@ -38,94 +65,168 @@ def calc_scores(obs_list):
     texto = limpiar_texto(" ".join(obs_list))
     texto = quitar_acentos(texto)
 
-    sc = score_keywords(texto, PALABRAS_CIENCIA, MODIFICADORES)
-    sn = score_keywords(texto, PALABRAS_NUMERO, MODIFICADORES)
-    ss = score_keywords(texto, PALABRAS_SOCIAL, MODIFICADORES)
+    sc = SCORER_CIENCIA.score(texto)
+    sn = SCORER_NUMERO.score(texto)
+    ss = SCORER_SOCIAL.score(texto)
 
     return max(0, sc), max(0, sn), max(0, ss)
 
-# Builder principal
 
-def build_master_dataset(
-    anio_academico="2025-2026",
-    semestre=1,
-    modelo_nlp=None
-):
-    data = load_base_data()
+SCORES_KW = ["score_ciencia", "score_num", "score_social"]
 
-    est = data["est"]
-    rend = data["rend"]
-    obs = data["obs"]
 
-    #  CONTEXTO SOCIAL (opcional) 
-    try:
-        cs = pd.read_csv(f"{RAW_PATH}/contexto_formulario.csv")
-        
-    except FileNotFoundError:
-        cs = pd.DataFrame(columns=["id_estudiante", "CS"])
-
-    # RENDIMIENTO 
-    rend = rend[
-        (rend["año_academico"] == anio_academico) &
-        (rend["semestre"] == semestre)
+def calc_scores_batch(obs_lists):
+    # calc_scores para toda la cohorte: una pasada por lista de palabras
+    textos = [
+        quitar_acentos(limpiar_texto(" ".join(x))) if isinstance(x, list) else ""
+        for x in obs_lists
     ]
-
-    periodos = ["P1", "P2", "P3", "P4"]
-    rend["nota"] = rend["CF"].fillna(rend[periodos].mean(axis=1))
-
-    rend_agg = (
-        rend.groupby("id_estudiante")
-        .agg(
-            nota_promedio=("nota", "mean"),
-            asistencia=("asistencia", "mean"),
-            var_nota=("nota", "std") # desviacion estandar como varianza
-        )
-        .reset_index()
-    )
-
-    rend_agg["var_nota"] = rend_agg["var_nota"].fillna(0)
-    rend_agg.to_csv(f"{PROC_PATH}/rendimiento_agg.csv", index=False)
-
-    # OBSERVACIONES 
-    obs_agg = (
-        obs.groupby("id_estudiante")["observacion"]
-        .apply(list)
-        .reset_index()
-    )
-
-    obs_agg["F"] = obs_agg["observacion"].apply(
-        lambda x: puntaje_ambiente(" ".join(x), modelo_nlp)
-        if isinstance(x, list) else 0.5
+    out = {}
+    for col, scorer in zip(SCORES_KW, (SCORER_CIENCIA, SCORER_NUMERO, SCORER_SOCIAL)):
+        v = np.maximum(0, scorer.score_many(textos))
+        # entero si no hubo ponderacion por modificador, como en calc_scores
+        out[col] = v.astype(np.int64) if np.all(v == np.floor(v)) else v
+    return pd.DataFrame(out)
+
+# Build incremental por estudiante
+
+# subir si cambia la logica del build: invalida todas las huellas guardadas
+VERSION_BUILD = 2
+
+
+def _leer_cs(base=RAW_PATH):
+    # formularios de contexto social (core.contexto_store)
+    return leer_contexto(base)
+
+
+def _huella_filas(df):
+    # hash por fila, combinado por estudiante respetando el orden de las filas
+    df = df[df["id_estudiante"].notna()]
+    if df.empty:
+        return {}
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    pos = df.groupby("id_estudiante").cumcount().to_numpy().astype(np.uint64)
+    h = pd.util.hash_array(h ^ (pos * np.uint64(0x9E3779B97F4A7C15)))
+    ids = df["id_estudiante"].to_numpy().astype(np.int64)
+    return pd.Series(h, index=ids).groupby(level=0).sum().to_dict()
+
+
+def huellas_estudiantes(est, rend, obs, cs, contexto=""):
+    """
+    Huella por estudiante de todo lo que entra a su fila del master: fila de
+    estudiantes, registros de rendimiento del periodo, observaciones y fila
+    de contexto social. contexto agrega lo que afecta a todos (modelo, version
+    del build, opciones).
+    """
+    partes = [_huella_filas(df) for df in (est, rend, obs, cs)]
+    ids = set().union(*partes)
+    huellas = {}
+    for i in ids:
+        h = hashlib.blake2b(contexto.encode("utf-8"), digest_size=16)
+        for parte in partes:
+            h.update(int(parte.get(i, 0)).to_bytes(8, "little"))
+        huellas[int(i)] = h.hexdigest()
+    return huellas
+
+
+def _hash_bytes(datos):
+    return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+
+def _leer_huellas(path, path_master, path_obs):
+    """
+    Huellas del build anterior de este periodo y el contenido de
+    observaciones_agg.csv a fusionar, o ({}, None) si hay que hacer un build
+    completo: falta el master, o observaciones_agg.csv (uno solo para todos
+    los periodos) ya no es el que escribio ese build. Se devuelven los mismos
+    bytes cuyo hash se comprobo, por si otro build reemplaza el archivo.
+    """
+    if not os.path.exists(path_master):
+        return {}, None
+    try:
+        with open(path, encoding="utf-8") as f:
+            datos = json.load(f)
+        with open(path_obs, "rb") as f:
+            obs = f.read()
+        if datos["observaciones_agg"] != _hash_bytes(obs):
+            return {}, None
+        return {int(k): v for k, v in datos["estudiantes"].items()}, obs
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return {}, None
+
+
+def _fusionar(path, nuevos, reutilizados, orden):
+    """
+    Filas recalculadas + filas del archivo anterior de los estudiantes sin
+    cambios, en el orden que tendria el build completo. Las nuevas pasan por
+    CSV para quedar con los mismos tipos que las leidas del archivo
+    (round_trip: los float se releen sin perder el ultimo digito).
+    """
+    viejos = pd.read_csv(path, float_precision="round_trip")
+    viejos = viejos[viejos["id_estudiante"].isin(reutilizados)]
+    if not nuevos.empty:
+        nuevos = pd.read_csv(io.StringIO(nuevos.to_csv(index=False)), float_precision="round_trip")
+        viejos = pd.concat([viejos, nuevos[viejos.columns]], ignore_index=True)
+    posicion = {i: n for n, i in enumerate(orden)}
+    clave = viejos["id_estudiante"].map(posicion)
+    return viejos[clave.notna()].iloc[np.argsort(clave[clave.notna()].to_numpy(), kind="stable")]
+
+
+def _tipos_como_completo(df, tipos):
+    """
+    Tipos numericos que tendria el build completo. Una columna entera en su
+    origen (tipos) queda entera si no tiene NaN y float si los tiene; las
+    filas reutilizadas vienen de un CSV con los tipos del build anterior.
+    """
+    for col, tipo in tipos.items():
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if pd.api.types.is_integer_dtype(tipo) and df[col].notna().all():
+            df[col] = df[col].astype(np.int64)
+        elif pd.api.types.is_float_dtype(tipo) or pd.api.types.is_integer_dtype(tipo):
+            df[col] = df[col].astype(np.float64)
+    return df
+
+
+def _enteros_si_exactos(df, columnas):
+    # misma regla que calc_scores_batch, pero sobre la columna completa
+    for col in columnas:
+        v = df[col].to_numpy(dtype=float)
+        exactos = not np.isnan(v).any() and np.all(v == np.floor(v))
+        df[col] = v.astype(np.int64) if exactos else v
+    return df
+
+
+def _procesar_observaciones(obs_agg, modelo_nlp, cache):
+    # un solo lote por estudiante (texto unido) y otro por observacion
+    obs_agg["F"] = cache.puntajes(
+        obs_agg["observacion"].apply(" ".join), modelo_nlp
     )
 
-    obs_agg["var_F"] = obs_agg["observacion"].apply( # variablidad del contexto, ambiente segun las observaciones
-        lambda x: np.std([
-            puntaje_ambiente(o, modelo_nlp) for o in x
-        ]) if isinstance(x, list) and len(x) > 1 else 0
+    # variablidad del contexto, ambiente segun las observaciones
+    scores_obs = cache.puntajes(
+        [o for x in obs_agg["observacion"] for o in x], modelo_nlp
     )
+    largos = obs_agg["observacion"].apply(len).to_numpy()
+    inicios = np.concatenate([[0], np.cumsum(largos)[:-1]]).astype(int)
+    obs_agg["var_F"] = [
+        np.std(scores_obs[i:i + n]) if n > 1 else 0
+        for i, n in zip(inicios, largos)
+    ]
 
     obs_agg["num_obs"] = obs_agg["observacion"].apply(len)
-    obs_agg[["score_ciencia", "score_num", "score_social"]] = (
-        obs_agg["observacion"]
-        .apply(lambda x: pd.Series(calc_scores(x)))
-    )
+    scores_kw = calc_scores_batch(obs_agg["observacion"])
+    for col in scores_kw.columns:
+        obs_agg[col] = scores_kw[col].to_numpy()
 
     obs_agg["observaciones"] = obs_agg["observacion"].apply(
         lambda x: " | ".join(x)
     )
 
-    obs_agg.drop(columns=["observacion"], inplace=True)
-    obs_agg.to_csv(f"{PROC_PATH}/observaciones_agg.csv", index=False)
-
-    # CONTEXTO SOCIAL 
-    if "CS_fuente" not in cs.columns:
-        cs["CS_fuente"] = "formulario"
+    return obs_agg.drop(columns=["observacion"])
 
-    cs.to_csv(f"{PROC_PATH}/contexto_formulario.csv", index=False)
-
-    cs["CS"] = pd.to_numeric(cs["CS"], errors="coerce")
-    cs["CS"] = cs["CS"].clip(0, 1)
 
+def _construir_master(est, rend_agg, obs_agg, cs, top_k_areas, base=RAW_PATH):
     # MASTER MERGE 
     df = (
         est
@@ -137,14 +238,136 @@ def build_master_dataset(
     # CS queda como NaN si no hay formulario; calcular_riesgo lo maneja
 
     # RIESGO 
-    df[["Rd", "F"]] = df.apply(
-        lambda r: pd.Series(calcular_riesgo(r, modelo_nlp)),
-        axis=1
-    )
+    # F ya viene de obs_agg; sin observaciones el ambiente es neutro (0.5)
+    df["F"] = df["F"].fillna(0.5)
+    riesgo = calcular_riesgo_frame(df)
+    df["Rd"] = riesgo["Rd"]
+    df["F"] = riesgo["F"]
+
+    # AREAS RECOMENDADAS (opcional: carga el modelo de embeddings)
+    if top_k_areas and len(df):
+        from core.semantic_matcher import preparar_areas, recomendar_areas_batch
+
+        areas = preparar_areas(load_areas(base))
+        df = df.join(recomendar_areas_batch(df, areas, top_k=top_k_areas))
+    return df
+
 
-    # SAVE MASTER 
-    fname = f"df_master_{anio_academico}_{semestre}.csv"
-    path = f"{MASTER_PATH}/{fname}"
-    df.to_csv(path, index=False)
+# Builder principal
+
+def build_master_dataset(
+    anio_academico="2025-2026",
+    semestre=1,
+    modelo_nlp=None,
+    reporte=None,
+    top_k_areas=0,
+    completo=False,
+    chunksize=None,
+    base=BASE_PATH
+):
+    # reporte: dict opcional que se llena con las metricas del build
+    # top_k_areas: si es > 0 agrega area_1..k / afinidad_1..k al master
+    # completo: recalcula todos los estudiantes aunque sus huellas no cambien
+    # chunksize: build completo por bloques de ese tamaño (core.build_streaming)
+    # base: carpeta de datasets (crudos en base, salida en base/processed y base/master)
+    if chunksize:
+        from core.build_streaming import build_master_streaming
+
+        return build_master_streaming(
+            anio_academico, semestre, modelo_nlp, reporte, top_k_areas, chunksize, base
+        )
+
+    inicio = time.perf_counter()
+    raw_path, proc_path, master_path = rutas(base)
+    os.makedirs(proc_path, exist_ok=True)
+    # lectura y agrupado compartidos con las paginas (core.agregados)
+    ag = agregados(anio_academico, semestre, raw_path)
+    cache = CachePuntajes(os.path.join(proc_path, "cache_puntajes.pkl"))
+
+    est = ag["est"]
+
+    #  CONTEXTO SOCIAL (opcional) 
+    cs = _leer_cs(raw_path)
+    escribir_csv(cs, f"{proc_path}/contexto_formulario.csv")
+
+    cs["CS"] = pd.to_numeric(cs["CS"], errors="coerce")
+    cs["CS"] = cs["CS"].clip(0, 1)
+
+    # ESTUDIANTES A RECALCULAR
+    path = ruta_particion(anio_academico, semestre, master_path)
+    rend_path = f"{proc_path}/rendimiento_agg.csv"
+    obs_path = f"{proc_path}/observaciones_agg.csv"
+    huellas_path = f"{proc_path}/huellas_{anio_academico}_{semestre}.json"
+
+    modelo = huella_modelo() if modelo_nlp is not None else "sin_modelo"
+    contexto = f"{VERSION_BUILD}|{modelo}|{top_k_areas}"
+    if top_k_areas:
+        # las areas recomendadas dependen del catalogo y del modo de embeddings
+        from core.semantic_matcher import _clave_areas, preparar_areas
+
+        areas = preparar_areas(load_areas(raw_path))
+        contexto += "|" + _clave_areas(areas["texto_area"].astype(str).tolist())
+    huellas = huellas_estudiantes(est, ag["rend"], ag["obs"], cs, contexto)
+    previas, obs_previo = {}, None
+    if not completo:
+        previas, obs_previo = _leer_huellas(huellas_path, path, obs_path)
+    sucios = {i for i, h in huellas.items() if previas.get(i) != h}
+    reutilizados = set(huellas) - sucios
+
+    # RENDIMIENTO (nota, asistencia y var_nota del periodo)
+    # rendimiento_agg.csv es uno solo para todos los periodos: se reescribe
+    # entero en cada build (es barato) en vez de fusionarse con otro periodo
+    rend_agg = ag["por_estudiante"]
+    escribir_csv(rend_agg, rend_path)
+
+    # OBSERVACIONES 
+    obs_agg = ag["observaciones"]
+
+    if reutilizados:
+        # solo los estudiantes con cambios; el resto sale del master anterior
+        en_sucios = lambda d: d[d["id_estudiante"].isin(sucios)]
+        obs_nuevas = _procesar_observaciones(en_sucios(obs_agg).copy(), modelo_nlp, cache)
+        df_nuevo = _construir_master(
+            en_sucios(est).reset_index(drop=True), en_sucios(rend_agg), obs_nuevas, cs, top_k_areas,
+            raw_path
+        )
+        obs_out = _fusionar(io.BytesIO(obs_previo), obs_nuevas, reutilizados, obs_agg["id_estudiante"])
+        # el tipo de los puntajes (int o float) se decide con toda la cohorte,
+        # no solo con los estudiantes recalculados
+        obs_out = _enteros_si_exactos(obs_out, ["num_obs", *SCORES_KW])
+        df = _fusionar(path, df_nuevo, reutilizados, est["id_estudiante"])
+        tipos = {**rend_agg.dtypes, **obs_out.dtypes, **cs.dtypes, **est.dtypes}
+        df = _tipos_como_completo(df, tipos)
+    else:
+        obs_out = _procesar_observaciones(obs_agg.copy(), modelo_nlp, cache)
+        df = _construir_master(est, rend_agg, obs_out, cs, top_k_areas, raw_path)
+
+    # sin huellas mientras se escriben los archivos: si el build se corta a
+    # mitad, el proximo es completo en vez de reutilizar filas a medio escribir
+    if os.path.exists(huellas_path):
+        os.remove(huellas_path)
+    hash_obs = escribir_csv(obs_out, obs_path, huella=True)
+
+    # SAVE MASTER (particion del periodo + catalogo)
+    guardar_particion(df, anio_academico, semestre, time.perf_counter() - inicio, master_path)
+    # huellas al final y con os.replace, nunca un json a medio escribir;
+    # guardan tambien el hash del observaciones_agg.csv que se fusiono
+    tmp = f"{huellas_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "observaciones_agg": hash_obs,
+            "estudiantes": {str(i): h for i, h in huellas.items()},
+        }, f)
+    os.replace(tmp, huellas_path)
+
+    cache.guardar()
+    resumen = cache.resumen()
+    # cada miss es un texto que paso por el modelo en este build
+    resumen["inferencias"] = cache.misses
+    resumen["sucios"] = len(sucios)
+    resumen["reutilizados"] = len(reutilizados)
+    log.info("master %s_%s: %s", anio_academico, semestre, resumen)
+    if reporte is not None:
+        reporte.update(resumen)
 
     return path
@@ -0,0 +1,164 @@
+# core/build_paralelo.py
+#
+# Varios builds del master (periodos y/o escuelas, cada escuela con su
+# carpeta de datasets) repartidos en un pool de procesos.
+#
+# Los workers arrancan con "spawn" por defecto, como el entrenamiento de
+# core.model_registry: build_many se llama desde el servidor de streamlit,
+# que tiene hilos (tornado, otras sesiones) y quizas torch cargado, y un fork
+# de un proceso con hilos puede dejar locks tomados en el hijo. Un script de
+# un solo hilo puede pedir inicio="fork".
+#
+# El modelo NLP se carga una vez por worker en el initializer, no por tarea:
+# con fork los workers heredan el que ya cargo el proceso padre, y con spawn
+# cada uno lo abre del registro con mmap, asi que los arrays del modelo son
+# las mismas paginas del archivo en todos los procesos.
+#
+# Con top_k_areas el modelo de embeddings (torch, cientos de MB) tambien se
+# carga antes del pool y en el initializer: con fork se comparte, y cada
+# worker limita los hilos de torch a su parte de los CPU. Sin fork cada worker
+# tendria su propia copia, asi que el pool se limita a MAX_PROCESOS_EMBEDDINGS.
+#
+# Un build que falla no corta los demas: su resultado lleva error y el
+# catalogo se regenera igual al final.
+#
+# Cada build es el mismo build_master_dataset de una corrida secuencial, asi
+# que los masters son identicos. Lo compartido entre builds de una misma
+# escuela (processed/, cache de puntajes, embeddings) se escribe con archivos
+# temporales por proceso y os.replace; processed/rendimiento_agg.csv queda
+# del ultimo periodo que termino, como cuando se corren uno detras de otro.
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.build_dataset import BASE_PATH, build_master_dataset, rutas
+from core.master_store import actualizar_catalogo
+
+log = logging.getLogger(__name__)
+
+# workers sin fork que cargan cada uno el modelo de embeddings
+MAX_PROCESOS_EMBEDDINGS = 2
+
+_modelo_nlp = None
+
+
+def _iniciar_worker(con_modelo, con_embeddings=False, hilos=0):
+    global _modelo_nlp
+    _modelo_nlp = None
+    if con_modelo:
+        from core.nlp import cargar_modelo_nlp
+
+        _modelo_nlp = cargar_modelo_nlp()
+    if con_embeddings:
+        from core import semantic_matcher
+
+        # no-op si el modelo ya vino del proceso padre (fork)
+        semantic_matcher._get_model()
+        if hilos > 0:
+            import torch
+
+            torch.set_num_threads(hilos)
+
+
+def _build(tarea, opciones):
+    reporte = {}
+    inicio = time.perf_counter()
+    try:
+        path = build_master_dataset(
+            tarea["anio_academico"], tarea["semestre"], _modelo_nlp, reporte,
+            base=tarea["base"], **opciones
+        )
+        error = None
+    except Exception as e:
+        path, error = None, repr(e)
+    return {
+        **tarea,
+        "path": path,
+        "segundos": time.perf_counter() - inicio,
+        "pid": os.getpid(),
+        "reporte": reporte,
+        "error": error,
+    }
+
+
+def build_many(
+    periodos, bases=(BASE_PATH,), con_modelo=True, procesos=None, progreso=None,
+    inicio="spawn", **opciones
+):
+    """
+    build_master_dataset para cada (anio_academico, semestre) de periodos en
+    cada carpeta de bases.
+
+    con_modelo: puntaje de ambiente con el modelo NLP activo (False: F neutro).
+    procesos: tamaño del pool (None: uno por CPU, sin pasar de la cantidad
+    de builds; 1: secuencial en este proceso). progreso(resultado) se llama
+    al terminar cada build. inicio: metodo de arranque de los workers
+    ("spawn", "forkserver" o "fork"). opciones van a build_master_dataset
+    (top_k_areas, completo, chunksize).
+
+    Devuelve un resultado por build, en el orden de entrada: anio_academico,
+    semestre, base, path, segundos, pid, reporte y error (None si termino
+    bien; si fallo, path es None y error describe la excepcion).
+    """
+    tareas = [
+        {"anio_academico": anio, "semestre": sem, "base": base}
+        for base in bases
+        for anio, sem in periodos
+    ]
+    cpus = os.cpu_count() or 1
+    procesos = min(procesos or cpus, len(tareas) or 1)
+    con_embeddings = bool(opciones.get("top_k_areas"))
+    if con_embeddings and inicio != "fork":
+        procesos = min(procesos, MAX_PROCESOS_EMBEDDINGS)
+    resultados = [None] * len(tareas)
+
+    def terminado(i, resultado):
+        resultados[i] = resultado
+        hechos = sum(r is not None for r in resultados)
+        log.log(
+            logging.ERROR if resultado["error"] else logging.INFO,
+            "build %d/%d %s %s_%s: %.2f s (pid %s)%s", hechos, len(tareas), resultado["base"],
+            resultado["anio_academico"], resultado["semestre"], resultado["segundos"],
+            resultado["pid"], f" fallo: {resultado['error']}" if resultado["error"] else "",
+        )
+        if progreso is not None:
+            progreso({**resultado, "hechos": hechos, "total": len(tareas)})
+
+    # antes del pool: si no hay modelo se entrena una sola vez, y con fork
+    # los workers heredan los ya cargados
+    _iniciar_worker(con_modelo, con_embeddings)
+
+    try:
+        if procesos == 1:
+            for i, tarea in enumerate(tareas):
+                terminado(i, _build(tarea, opciones))
+        else:
+            hilos = max(1, cpus // procesos) if con_embeddings else 0
+            with ProcessPoolExecutor(
+                procesos, mp_context=multiprocessing.get_context(inicio),
+                initializer=_iniciar_worker, initargs=(con_modelo, con_embeddings, hilos)
+            ) as pool:
+                futuros = {pool.submit(_build, tarea, opciones): i for i, tarea in enumerate(tareas)}
+                for futuro in as_completed(futuros):
+                    i = futuros[futuro]
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        # el worker murio (BrokenProcessPool) o el resultado no volvio
+                        resultado = {
+                            **tareas[i], "path": None, "segundos": 0.0, "pid": None,
+                            "reporte": {}, "error": repr(e),
+                        }
+                    terminado(i, resultado)
+    finally:
+        # con builds en paralelo el catalogo de cada escuela se regenera al
+        # final, tambien si alguno fallo
+        for base in dict.fromkeys(bases):
+            master_path = rutas(base)[2]
+            # sin carpeta master: ningun build de esa escuela llego a escribir
+            if os.path.isdir(master_path):
+                actualizar_catalogo(master_path)
+    return resultados
@@ -0,0 +1,337 @@
+# core/build_streaming.py
+#
+# Build del master por bloques, para exportaciones que no entran en memoria.
+# Misma salida que build_master_dataset, byte a byte, con memoria acotada
+# por chunksize:
+#
+#   1. rendimiento.csv por bloques: por estudiante se acumulan conteo, suma
+#      (Kahan) y media/m2 (Welford) de nota y asistencia, con las mismas
+#      operaciones que groupby de pandas; de ahi salen nota_promedio,
+#      asistencia y var_nota
+#   2. observaciones.csv: una pasada que solo cuenta filas por estudiante y
+#      arma rangos de estudiantes de a lo sumo chunksize observaciones; una
+#      segunda pasada reparte las filas en un archivo temporal por rango
+#   3. cada rango se procesa como el build normal (puntajes, riesgo, areas) y
+#      sus filas del master se guardan ordenadas por posicion en estudiantes
+#   4. merge de los rangos por esa posicion: el master queda en el orden de
+#      estudiantes.csv sin tener todas las filas en memoria
+#
+# estudiantes y contexto_formulario (una fila por estudiante) se leen enteros.
+
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.agregados import nota_canonica
+from core.build_dataset import (
+    BASE_PATH,
+    RAW_PATH,
+    SCORES_KW,
+    _construir_master,
+    _leer_cs,
+    _procesar_observaciones,
+    escribir_csv,
+    log,
+    rutas,
+)
+from core.data_loader import aplicar_plan, load_csv
+from core.master_store import registrar_particion, ruta_particion
+from core.score_cache import CachePuntajes
+
+CHUNKSIZE = 100_000
+
+
+def _leer_por_bloques(nombre, chunksize, base=RAW_PATH):
+    for bloque in pd.read_csv(os.path.join(base, nombre), chunksize=chunksize):
+        yield aplicar_plan(bloque)
+
+
+class _Acumulador:
+    """
+    Media (suma de Kahan) y desviacion estandar (Welford) por estudiante,
+    con las mismas operaciones y en el mismo orden de filas que groupby
+    mean/std de pandas: el resultado es identico al del archivo entero.
+    """
+
+    CAMPOS = ("n", "media", "m2", "suma", "comp", "n_asist", "suma_asist", "comp_asist")
+
+    def __init__(self):
+        self.ids = np.empty(0)
+        self.estado = {c: np.empty(0) for c in self.CAMPOS}
+
+    def _posiciones(self, ids):
+        nuevos = np.setdiff1d(ids, self.ids)
+        if len(nuevos):
+            self.ids = np.concatenate([self.ids, nuevos])
+            for c in self.CAMPOS:
+                self.estado[c] = np.concatenate([self.estado[c], np.zeros(len(nuevos))])
+        return pd.Index(self.ids).get_indexer(ids)
+
+    @staticmethod
+    def _kahan(suma, comp, i, val):
+        y = val - comp[i]
+        t = suma[i] + y
+        c = t - suma[i] - y
+        comp[i] = np.where(np.isnan(c), 0, c)
+        suma[i] = t
+
+    def agregar(self, ids, nota, asistencia):
+        e = self.estado
+        pos = self._posiciones(ids)
+        # la k-esima fila de cada estudiante en el bloque, en orden de archivo
+        nivel = pd.Series(pos).groupby(pos).cumcount().to_numpy()
+        for k in range(nivel.max() + 1):
+            fila = nivel == k
+
+            v = nota[fila]
+            i, v = pos[fila][~np.isnan(v)], v[~np.isnan(v)]
+            e["n"][i] += 1
+            self._kahan(e["suma"], e["comp"], i, v)
+            anterior = e["media"][i]
+            e["media"][i] = anterior + (v - anterior) / e["n"][i]
+            e["m2"][i] += (v - anterior) * (v - e["media"][i])
+
+            v = asistencia[fila]
+            i, v = pos[fila][~np.isnan(v)], v[~np.isnan(v)]
+            e["n_asist"][i] += 1
+            self._kahan(e["suma_asist"], e["comp_asist"], i, v)
+
+    def resultado(self):
+        e = self.estado
+        orden = np.argsort(self.ids, kind="stable")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = e["suma"] / e["n"]
+            asistencia = e["suma_asist"] / e["n_asist"]
+            # desviacion estandar muestral (ddof=1), como pandas std
+            var_nota = np.where(e["n"] > 1, np.sqrt(e["m2"] / (e["n"] - 1)), 0)
+        return self.ids[orden], media[orden], asistencia[orden], var_nota[orden]
+
+
+def agregar_rendimiento(anio_academico, semestre, chunksize=CHUNKSIZE, base=RAW_PATH):
+    """
+    nota_promedio, asistencia y var_nota por estudiante leyendo
+    rendimiento.csv por bloques (mismo resultado que core.agregados).
+    """
+    acumulado, id_float = _Acumulador(), False
+    for rend in _leer_por_bloques("rendimiento.csv", chunksize, base):
+        # un id vacio en cualquier bloque deja los ids como float, igual que
+        # al leer el archivo entero
+        id_float |= not pd.api.types.is_integer_dtype(rend["id_estudiante"])
+        rend = rend[
+            (rend["año_academico"] == anio_academico) &
+            (rend["semestre"] == semestre) &
+            rend["id_estudiante"].notna()
+        ]
+        if rend.empty:
+            continue
+        acumulado.agregar(
+            rend["id_estudiante"].to_numpy(dtype=np.float64),
+            nota_canonica(rend).to_numpy(dtype=np.float64),
+            rend["asistencia"].to_numpy(dtype=np.float64),
+        )
+
+    if not len(acumulado.ids):
+        return pd.DataFrame(columns=["id_estudiante", "nota_promedio", "asistencia", "var_nota"])
+
+    ids, media, asistencia, var_nota = acumulado.resultado()
+    return pd.DataFrame({
+        "id_estudiante": ids.astype(np.float64 if id_float else np.int32),
+        "nota_promedio": media,
+        "asistencia": asistencia,
+        "var_nota": var_nota,
+    })
+
+
+def contar_observaciones(chunksize=CHUNKSIZE, base=RAW_PATH):
+    # primera pasada sobre observaciones.csv: solo id_estudiante
+    conteo = None
+    for bloque in pd.read_csv(
+        os.path.join(base, "observaciones.csv"), usecols=["id_estudiante"], chunksize=chunksize
+    ):
+        c = bloque["id_estudiante"].value_counts()
+        conteo = c if conteo is None else conteo.add(c, fill_value=0)
+    return pd.Series(dtype=np.int64) if conteo is None else conteo.sort_index()
+
+
+def rangos_observaciones(conteo, chunksize=CHUNKSIZE):
+    """
+    Limites de rangos de ids con a lo sumo chunksize observaciones cada uno
+    (conteo de contar_observaciones). Un estudiante con mas observaciones que
+    chunksize queda solo en su rango.
+    """
+    limites, filas = [], 0
+    for i, n in conteo.items():
+        if filas and filas + n > chunksize:
+            limites.append(i)
+            filas = 0
+        filas += n
+    # rango j = [limites[j-1], limites[j]); el primero y el ultimo son abiertos
+    return np.asarray(limites)
+
+
+def _repartir_observaciones(limites, directorio, chunksize, base=RAW_PATH):
+    # segunda pasada: cada fila al archivo de su rango, en el orden original
+    rutas = {}
+    for obs in _leer_por_bloques("observaciones.csv", chunksize, base):
+        obs = obs[obs["id_estudiante"].notna()]
+        rango = np.searchsorted(limites, obs["id_estudiante"].to_numpy(), side="right")
+        for j, parte in obs.groupby(rango, sort=False):
+            ruta = rutas.setdefault(j, os.path.join(directorio, f"obs_{j:06d}.csv"))
+            parte.to_csv(ruta, mode="a", header=not os.path.exists(ruta), index=False)
+    return [rutas[j] for j in sorted(rutas)]
+
+
+def _filas_master(df, posicion, ruta, columnas):
+    # filas del master de un rango, ordenadas por posicion en estudiantes.csv
+    df = df.assign(_pos=df["id_estudiante"].map(posicion)).sort_values("_pos", kind="stable")
+    df[["_pos"] + columnas].to_csv(ruta, header=False, index=False)
+
+
+def _a_float(celda):
+    # un entero escrito por un rango ("3") como lo escribe pandas en float
+    return repr(float(celda)) if celda.lstrip("-").isdigit() else celda
+
+
+def _reescribir_float(ruta, columnas):
+    # segunda pasada sobre un csv ya escrito, fila a fila
+    tmp = f"{ruta}.float"
+    with open(ruta, newline="", encoding="utf-8") as f, \
+            open(tmp, "w", newline="", encoding="utf-8") as g:
+        reader, writer = csv.reader(f), csv.writer(g, lineterminator="\n")
+        cabecera = next(reader)
+        writer.writerow(cabecera)
+        idx = [cabecera.index(c) for c in columnas if c in cabecera]
+        for fila in reader:
+            for i in idx:
+                fila[i] = _a_float(fila[i])
+            writer.writerow(fila)
+    os.replace(tmp, ruta)
+
+
+def _leer_filas(ruta):
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for fila in csv.reader(f):
+            yield int(fila[0]), fila[1:]
+
+
+def build_master_streaming(
+    anio_academico="2025-2026",
+    semestre=1,
+    modelo_nlp=None,
+    reporte=None,
+    top_k_areas=0,
+    chunksize=CHUNKSIZE,
+    base=BASE_PATH
+):
+    """
+    build_master_dataset con memoria acotada por chunksize (filas de
+    rendimiento u observaciones por bloque). Siempre es un build completo.
+    """
+    inicio = time.perf_counter()
+    raw_path, proc_path, master_path = rutas(base)
+    os.makedirs(proc_path, exist_ok=True)
+    cache = CachePuntajes(os.path.join(proc_path, "cache_puntajes.pkl"))
+
+    est = load_csv("estudiantes.csv", raw_path)
+    posicion = pd.Series(np.arange(len(est)), index=est["id_estudiante"])
+
+    cs = _leer_cs(raw_path)
+    escribir_csv(cs, f"{proc_path}/contexto_formulario.csv")
+    cs["CS"] = pd.to_numeric(cs["CS"], errors="coerce").clip(0, 1)
+
+    rend_agg = agregar_rendimiento(anio_academico, semestre, chunksize, raw_path)
+    escribir_csv(rend_agg, f"{proc_path}/rendimiento_agg.csv")
+
+    path = ruta_particion(anio_academico, semestre, master_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    obs_path = f"{proc_path}/observaciones_agg.csv"
+    tmpdir = tempfile.mkdtemp(prefix="build_", dir=proc_path)
+    try:
+        conteo = contar_observaciones(chunksize, raw_path)
+        rutas_obs = _repartir_observaciones(
+            rangos_observaciones(conteo, chunksize), tmpdir, chunksize, raw_path
+        )
+
+        # en el build en memoria, si algun estudiante no tiene observaciones
+        # el merge deja num_obs y los puntajes como float en todo el master
+        sin_obs = ~est["id_estudiante"].isin(conteo.index)
+
+        # cada rango decide int o float con sus propios puntajes; el build en
+        # memoria lo decide con toda la cohorte: si algun rango salio float,
+        # esa columna se escribe float en todos
+        columnas, rutas_master, flotantes = None, [], set()
+        obs_tmp = os.path.join(tmpdir, "observaciones_agg.csv")
+        for j, ruta in enumerate(rutas_obs + [None]):
+            if ruta is not None:
+                obs = pd.read_csv(ruta)
+                obs_agg = obs.groupby("id_estudiante")["observacion"].apply(list).reset_index()
+                est_rango = est[est["id_estudiante"].isin(obs_agg["id_estudiante"])]
+            else:
+                obs_agg = pd.DataFrame({
+                    "id_estudiante": pd.Series([], dtype=est["id_estudiante"].dtype),
+                    "observacion": pd.Series([], dtype=object),
+                })
+                est_rango = est[sin_obs]
+            obs_agg = _procesar_observaciones(obs_agg, modelo_nlp, cache)
+            flotantes |= {c for c in SCORES_KW if not pd.api.types.is_integer_dtype(obs_agg[c])}
+            if ruta is not None or not os.path.exists(obs_tmp):
+                obs_agg.to_csv(obs_tmp, mode="a", header=not os.path.exists(obs_tmp), index=False)
+            if est_rango.empty:
+                continue
+
+            if sin_obs.any():
+                enteros = obs_agg.columns[1:][obs_agg.dtypes.iloc[1:].apply(pd.api.types.is_integer_dtype)]
+                obs_agg = obs_agg.astype({c: np.float64 for c in enteros})
+            rend_rango = rend_agg[rend_agg["id_estudiante"].isin(est_rango["id_estudiante"])]
+            df = _construir_master(
+                est_rango.reset_index(drop=True), rend_rango, obs_agg, cs, top_k_areas, raw_path
+            )
+            if columnas is None:
+                columnas = list(df.columns)
+            ruta_master = os.path.join(tmpdir, f"master_{j:06d}.csv")
+            _filas_master(df.reindex(columns=columnas), posicion, ruta_master, columnas)
+            rutas_master.append(ruta_master)
+
+        # SAVE MASTER: merge de los rangos en el orden de estudiantes.csv
+        filas = 0
+        tmp = f"{path}.{os.getpid()}.tmp"
+        idx = [i for i, c in enumerate(columnas or []) if c in flotantes]
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(columnas or list(est.columns))
+            for _, fila in heapq.merge(*(_leer_filas(r) for r in rutas_master), key=lambda x: x[0]):
+                for i in idx:
+                    fila[i] = _a_float(fila[i])
+                writer.writerow(fila)
+                filas += 1
+        os.replace(tmp, path)
+        if flotantes:
+            _reescribir_float(obs_tmp, flotantes)
+        os.replace(obs_tmp, obs_path)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    # las huellas del build incremental ya no describen este master
+    huellas_path = f"{proc_path}/huellas_{anio_academico}_{semestre}.json"
+    if os.path.exists(huellas_path):
+        os.remove(huellas_path)
+
+    registrar_particion(
+        anio_academico, semestre, filas, columnas or list(est.columns),
+        time.perf_counter() - inicio, master_path
+    )
+
+    cache.guardar()
+    resumen = cache.resumen()
+    resumen["inferencias"] = cache.misses
+    resumen["bloques"] = len(rutas_master)
+    log.info("master %s_%s (por bloques): %s", anio_academico, semestre, resumen)
+    if reporte is not None:
+        reporte.update(resumen)
+    return path
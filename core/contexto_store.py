@@ -0,0 +1,166 @@
+# core/contexto_store.py
+#
+# Puntajes de contexto social (CS) del formulario en SQLite (modo WAL):
+#
+#   contexto(id_estudiante PRIMARY KEY, CS, CS_fuente, actualizado)
+#   resumen(formularios, con_cs, suma_cs)   <- una sola fila
+#
+# Guardar un formulario es un upsert de una fila en una transaccion, asi que
+# dos envios simultaneos no se pisan (el segundo espera el lock de escritura
+# y WAL deja leer mientras tanto). resumen lo mantienen triggers en la misma
+# transaccion: las metricas del sidebar no recorren la tabla.
+#
+# Si la base no existe se crea importando datasets/contexto_formulario.csv
+# (PRAGMA user_version marca que ya se creo). Desde ese momento la base es la
+# fuente de verdad: editar el CSV a mano no cambia nada hasta correr
+# `python -m core.contexto_store importar`.
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from core.data_loader import DATASET
+
+ARCHIVO = "contexto_formulario.db"
+CSV = "contexto_formulario.csv"
+TIMEOUT = 30
+VERSION_ESQUEMA = 1
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contexto (
+    id_estudiante INTEGER PRIMARY KEY,
+    CS REAL,
+    CS_fuente TEXT NOT NULL DEFAULT 'formulario',
+    actualizado TEXT
+);
+CREATE TABLE IF NOT EXISTS resumen (
+    unico INTEGER PRIMARY KEY CHECK (unico = 1),
+    formularios INTEGER NOT NULL,
+    con_cs INTEGER NOT NULL,
+    suma_cs REAL NOT NULL
+);
+INSERT OR IGNORE INTO resumen VALUES (1, 0, 0, 0.0);
+
+CREATE TRIGGER IF NOT EXISTS contexto_alta AFTER INSERT ON contexto BEGIN
+    UPDATE resumen SET
+        formularios = formularios + 1,
+        con_cs = con_cs + (NEW.CS IS NOT NULL),
+        suma_cs = suma_cs + COALESCE(NEW.CS, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS contexto_cambio AFTER UPDATE OF CS ON contexto BEGIN
+    UPDATE resumen SET
+        con_cs = con_cs + (NEW.CS IS NOT NULL) - (OLD.CS IS NOT NULL),
+        suma_cs = suma_cs + COALESCE(NEW.CS, 0) - COALESCE(OLD.CS, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS contexto_baja AFTER DELETE ON contexto BEGIN
+    UPDATE resumen SET
+        formularios = formularios - 1,
+        con_cs = con_cs - (OLD.CS IS NOT NULL),
+        suma_cs = suma_cs - COALESCE(OLD.CS, 0);
+END;
+"""
+
+UPSERT = """
+INSERT INTO contexto (id_estudiante, CS, CS_fuente, actualizado) VALUES (?, ?, ?, ?)
+ON CONFLICT (id_estudiante) DO UPDATE SET
+    CS = excluded.CS, CS_fuente = excluded.CS_fuente, actualizado = excluded.actualizado
+"""
+
+
+def ruta_db(base=DATASET):
+    return os.path.join(base, ARCHIVO)
+
+
+def _filas(df):
+    ahora = time.strftime("%Y-%m-%dT%H:%M:%S")
+    df = df[df["id_estudiante"].notna()]
+    cs = pd.to_numeric(df["CS"], errors="coerce")
+    fuente = df["CS_fuente"] if "CS_fuente" in df.columns else pd.Series("formulario", index=df.index)
+    return [
+        (int(i), None if pd.isna(c) else float(c), str(f), ahora)
+        for i, c, f in zip(df["id_estudiante"], cs, fuente.fillna("formulario"))
+    ]
+
+
+def _crear(con, base):
+    # esquema e importacion del CSV en una sola transaccion: otro proceso que
+    # abra la base mientras tanto espera el lock y la encuentra ya cargada
+    con.executescript("BEGIN IMMEDIATE;" + ESQUEMA)
+    try:
+        csv_path = os.path.join(base, CSV)
+        vacia = con.execute("SELECT formularios FROM resumen").fetchone()[0] == 0
+        if vacia and os.path.exists(csv_path):
+            con.executemany(UPSERT, _filas(pd.read_csv(csv_path)))
+        con.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+
+def conectar(base=DATASET):
+    """
+    Conexion a la base de contexto (la crea si hace falta). Una por hilo:
+    sqlite3 no comparte conexiones entre los hilos de streamlit.
+    """
+    os.makedirs(base, exist_ok=True)
+    con = sqlite3.connect(ruta_db(base), timeout=TIMEOUT)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    if con.execute("PRAGMA user_version").fetchone()[0] < VERSION_ESQUEMA:
+        _crear(con, base)
+    return con
+
+
+def guardar_contexto(id_estudiante, cs, fuente="formulario", base=DATASET):
+    # upsert de un formulario; reemplaza el anterior del mismo estudiante
+    with closing(conectar(base)) as con, con:
+        con.execute(UPSERT, (int(id_estudiante), float(cs), fuente, time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+
+def importar_csv(path, base=DATASET):
+    # upsert de todas las filas de un CSV (id_estudiante, CS[, CS_fuente])
+    filas = _filas(pd.read_csv(path))
+    with closing(conectar(base)) as con, con:
+        con.executemany(UPSERT, filas)
+    return len(filas)
+
+
+def leer_contexto(base=DATASET):
+    """
+    DataFrame id_estudiante, CS, CS_fuente (una fila por estudiante con
+    formulario), ordenado por id_estudiante.
+    """
+    with closing(conectar(base)) as con:
+        df = pd.read_sql_query(
+            "SELECT id_estudiante, CS, CS_fuente FROM contexto ORDER BY id_estudiante", con
+        )
+    df["CS"] = df["CS"].astype(float)
+    return df
+
+
+def estadisticas(base=DATASET):
+    # metricas del sidebar: cantidad de formularios y CS promedio (None sin datos)
+    with closing(conectar(base)) as con:
+        formularios, con_cs, suma = con.execute(
+            "SELECT formularios, con_cs, suma_cs FROM resumen"
+        ).fetchone()
+    return {"formularios": formularios, "cs_promedio": suma / con_cs if con_cs else None}
+
+
+if __name__ == "__main__":
+    # python -m core.contexto_store importar [csv]   -> upsert del CSV en la base
+    # python -m core.contexto_store exportar [csv]   -> base completa a CSV
+    accion = sys.argv[1] if len(sys.argv) > 1 else "importar"
+    ruta = sys.argv[2] if len(sys.argv) > 2 else os.path.join(DATASET, CSV)
+    if accion == "importar":
+        print(f"{importar_csv(ruta)} formularios importados en {ruta_db()}")
+    elif accion == "exportar":
+        leer_contexto().to_csv(ruta, index=False)
+        print(ruta)
+    else:
+        sys.exit(f"accion desconocida: {accion}")
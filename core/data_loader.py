@@ -1,13 +1,141 @@
 import pandas as pd
+import json
 import os
+from functools import lru_cache
 
 DATASET = "datasets"
 
-def load_csv(name):
-    path = os.path.join(DATASET, name)
+# copia tipada de cada CSV (parquet si hay pyarrow, si no pickle) en
+# <carpeta>/.cache; se regenera cuando cambian el mtime o el tamaño del CSV
+CACHE_DIR = ".cache"
+
+# plan de tipos: ids int32 y columnas de pocos valores distintos como
+# category. Notas y asistencia quedan en float64: se promedian y redondean
+# en el build y en float32 cambiarian los decimales del master. Subir
+# VERSION_PLAN al cambiarlo
+PLAN_DTYPES = {
+    "id_estudiante": "int32",
+    "id_observacion": "int32",
+    "id_area": "int32",
+    "id_asignatura": "int32",
+    "asignatura": "category",
+    "aula": "category",
+    "autor": "category",
+    "año_academico": "category",
+    "genero": "category",
+}
+VERSION_PLAN = 2
+
+# consultas puntuales (consultar): "csv" filtra el DataFrame completo, que
+# queda en memoria; "sqlite" lee por indice de la copia en SQLite
+# (core.sql_store) mientras este al dia con el CSV, sin cargar el historial
+BACKEND = os.environ.get("DATOS_BACKEND", "csv")
+
+
+def _formato_cache():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "pickle"
+    return "parquet"
+
+
+def aplicar_plan(df):
+    for col, dtype in PLAN_DTYPES.items():
+        if col not in df.columns:
+            continue
+        # un id con huecos no entra en int32: se deja como lo leyo pandas
+        if dtype.startswith("int") and df[col].isna().any():
+            continue
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def firma_archivo(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "bytes": st.st_size, "plan": VERSION_PLAN}
+
+
+def _leer_cache(cache_path, firma):
+    try:
+        with open(f"{cache_path}.meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta != firma or not os.path.exists(cache_path):
+        return None
+    if cache_path.endswith(".parquet"):
+        return pd.read_parquet(cache_path)
+    return pd.read_pickle(cache_path)
+
+
+def _escribir_cache(df, cache_path, firma):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # tmp por proceso: dos builds en paralelo pueden generar la misma cache
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    if cache_path.endswith(".parquet"):
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, cache_path)
+    with open(f"{tmp}.meta.json", "w", encoding="utf-8") as f:
+        json.dump(firma, f)
+    os.replace(f"{tmp}.meta.json", f"{cache_path}.meta.json")
+
+
+def load_csv(name, base=DATASET):
+    path = os.path.join(base, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Falta {name}")
+
+    firma = firma_archivo(path)
+    cache_path = os.path.join(base, CACHE_DIR, f"{os.path.splitext(name)[0]}.{_formato_cache()}")
+    df = _leer_cache(cache_path, firma)
+    if df is None:
+        df = aplicar_plan(pd.read_csv(path))
+        try:
+            _escribir_cache(df, cache_path, firma)
+        except OSError:
+            # sin permisos de escritura: se sigue sin cache
+            pass
+    return df
+
+@lru_cache(maxsize=8)
+def _en_memoria(name, base, firma):
+    return load_csv(name, base)
+
+
+def en_memoria(name, base=DATASET):
+    """
+    DataFrame de un dataset memoizado por version del CSV. consultar y
+    core.agregados usan el mismo, asi que cada CSV esta una sola vez en
+    memoria; es compartido, quien lo modifique trabaja sobre una copia.
+    """
+    path = os.path.join(base, name)
     if not os.path.exists(path):
         raise FileNotFoundError(f"Falta {name}")
-    return pd.read_csv(path)
+    return _en_memoria(name, base, tuple(firma_archivo(path).values()))
+
+
+def consultar(name, base=DATASET, columnas=None, **filtros):
+    """
+    Filas de un dataset con columna == valor (o columna en una lista de
+    valores) para cada filtro, p.ej. consultar("observaciones.csv",
+    id_estudiante=5). Con BACKEND "sqlite" lee por indice si hay copia vigente.
+    """
+    if BACKEND == "sqlite":
+        from core import sql_store
+
+        if sql_store.vigente(name, base):
+            return sql_store.consultar(name, filtros, columnas, base)
+
+    df = en_memoria(name, base)
+    if not filtros:
+        df = df.copy()
+    for col, v in filtros.items():
+        valores = v if pd.api.types.is_list_like(v) else [v]
+        df = df[df[col].isin(valores)]
+    return df if columnas is None else df[columnas]
 
 def load_base_data():
     return {
@@ -18,8 +146,11 @@ def load_base_data():
     }
 
 
-def load_master():
-    return pd.read_csv("datasets/master/df_master_2025-2026_1.csv")
+def load_master(anio_academico=None, semestre=None, columnas=None):
+    # particiones por periodo (core.master_store); sin periodo, el mas reciente
+    from core.master_store import leer_master
+
+    return leer_master(anio_academico, semestre, columnas)
 
-def load_areas():
-    return pd.read_csv("datasets/areas_estudio.csv")
\ No newline at end of file
+def load_areas(base=DATASET):
+    return load_csv("areas_estudio.csv", base)
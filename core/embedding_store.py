@@ -0,0 +1,166 @@
+# core/embedding_store.py
+#
+# Almacen en disco de embeddings de observaciones, indexado por el hash del
+# contenido: cada observacion se codifica una sola vez y las siguientes
+# consultas la leen del archivo (memory mapping).
+#
+# Archivos (solo se agregan filas al final, nunca se reescriben):
+#   vectores.bin  filas de DIM valores en el formato del almacen
+#   escala.bin    float32 por fila (solo formato int8)
+#   claves.bin    digest de 16 bytes del texto de cada fila
+#   meta.json     dim y formato
+#
+# Varios procesos (builds, sesiones de streamlit) pueden compartir el
+# almacen: abrir y agregar filas se hace con un lock de archivo (.lock,
+# fcntl), y antes de agregar se leen las filas que hayan escrito los demas.
+# Sin fcntl (Windows) solo hay lock entre hilos de un mismo proceso.
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from core.vector_index import cuantizar, decuantizar
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def clave_observacion(texto):
+    return hashlib.blake2b(texto.strip().encode("utf-8"), digest_size=16).digest()
+
+
+@contextmanager
+def _lock_archivo(path):
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    def __init__(self, directorio, formato="float32"):
+        self.directorio = directorio
+        self.formato = formato
+        self.dtype = DTYPES[formato]
+        self.dim = None
+        self._filas = {}
+        self._vecs = None
+        self._escala = None
+        self._lock = threading.Lock()
+        with _lock_archivo(self._ruta(".lock")):
+            self._abrir()
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def __len__(self):
+        return len(self._filas)
+
+    def _abrir(self):
+        # con el lock de archivo tomado: recorta escrituras cortadas
+        try:
+            with open(self._ruta("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if meta.get("formato") != self.formato:
+            return
+        self.dim = meta["dim"]
+
+        # bytes crudos: un dtype "S16" recortaria los \x00 finales del digest
+        with open(self._ruta("claves.bin"), "rb") as f:
+            datos = f.read()
+        claves = [datos[i:i + 16] for i in range(0, len(datos) - 15, 16)]
+        n_vecs = os.path.getsize(self._ruta("vectores.bin")) // (self.dim * np.dtype(self.dtype).itemsize)
+        n = min(len(claves), n_vecs)
+        if self.formato == "int8":
+            n = min(n, os.path.getsize(self._ruta("escala.bin")) // 4)
+        # una escritura cortada a la mitad deja filas sin clave: se recortan
+        # para que las siguientes filas queden alineadas
+        os.truncate(self._ruta("vectores.bin"), n * self.dim * np.dtype(self.dtype).itemsize)
+        os.truncate(self._ruta("claves.bin"), n * 16)
+        if self.formato == "int8":
+            os.truncate(self._ruta("escala.bin"), n * 4)
+        self._filas = {c: i for i, c in enumerate(claves[:n])}
+        self._mapear(n)
+
+    def _mapear(self, n):
+        if n == 0:
+            self._vecs, self._escala = None, None
+            return
+        self._vecs = np.memmap(self._ruta("vectores.bin"), dtype=self.dtype, mode="r", shape=(n, self.dim))
+        if self.formato == "int8":
+            self._escala = np.memmap(self._ruta("escala.bin"), dtype=np.float32, mode="r", shape=(n,))
+
+    def _agregar(self, claves, vecs):
+        datos, escala = cuantizar(vecs, self.formato)
+        if self.dim is None:
+            self.dim = datos.shape[1]
+            os.makedirs(self.directorio, exist_ok=True)
+            for nombre in ("vectores.bin", "escala.bin", "claves.bin"):
+                open(self._ruta(nombre), "wb").close()
+            with open(self._ruta("meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "formato": self.formato}, f)
+
+        # vectores primero y claves al final: una fila sin clave no se usa
+        with open(self._ruta("vectores.bin"), "ab") as f:
+            f.write(np.ascontiguousarray(datos).tobytes())
+        if escala is not None:
+            with open(self._ruta("escala.bin"), "ab") as f:
+                f.write(escala.tobytes())
+        with open(self._ruta("claves.bin"), "ab") as f:
+            f.write(b"".join(claves))
+
+        inicio = len(self._filas)
+        for i, c in enumerate(claves):
+            self._filas[c] = inicio + i
+        self._mapear(len(self._filas))
+
+    def _sincronizar(self):
+        # filas agregadas por otro proceso desde la ultima lectura
+        try:
+            total = os.path.getsize(self._ruta("claves.bin")) // 16
+        except FileNotFoundError:
+            return
+        if total != len(self._filas):
+            self._abrir()
+
+    def vectores(self, textos, encode):
+        """
+        Embeddings (float32, normalizados) de textos, en el mismo orden.
+
+        encode(lista) -> array (n, dim); solo se llama, en un unico lote, con
+        los textos que todavia no estan en el almacen.
+        """
+        claves = [clave_observacion(t) for t in textos]
+        with self._lock:
+            if any(c not in self._filas for c in claves):
+                with _lock_archivo(self._ruta(".lock")):
+                    self._sincronizar()
+                    nuevas = {}
+                    for c, t in zip(claves, textos):
+                        if c not in self._filas and c not in nuevas:
+                            nuevas[c] = t.strip()
+                    if nuevas:
+                        vecs = np.asarray(encode(list(nuevas.values())), dtype=np.float32)
+                        self._agregar(list(nuevas), vecs)
+
+            if not claves:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            filas = np.fromiter((self._filas[c] for c in claves), dtype=np.int64, count=len(claves))
+            escala = None if self._escala is None else self._escala[filas]
+            return decuantizar(self._vecs[filas], escala)
@@ -0,0 +1,92 @@
+# core/indice_estudiantes.py
+#
+# Indice de los registros de la pagina de estudiantes (una fila por
+# estudiante y asignatura con nombre_estudiante, aula y nota). Se arma una
+# vez junto con el DataFrame y cada interaccion es una busqueda en un dict
+# mas un slice por posiciones, en vez de una mascara sobre todas las filas.
+
+import numpy as np
+
+
+def _posiciones(serie):
+    # valor -> posiciones (ordenadas) de sus filas
+    return {
+        k.item() if isinstance(k, np.generic) else k: v
+        for k, v in serie.groupby(serie, sort=False, observed=True).indices.items()
+    }
+
+
+class IndiceEstudiantes:
+    """
+    Posiciones por id_estudiante y por asignatura, id por nombre y
+    resumenes de nota por estudiante, por asignatura y generales.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        notas = self.df["nota"]
+
+        self._por_id = _posiciones(self.df["id_estudiante"])
+        asignaturas = self.df["asignatura"].astype(str)
+        self._por_asignatura = _posiciones(asignaturas)
+        # con nombres repetidos, el primer estudiante con ese nombre
+        primeros = self.df.drop_duplicates("nombre_estudiante")
+        self._id_por_nombre = dict(zip(
+            primeros["nombre_estudiante"].astype(str), primeros["id_estudiante"].tolist()
+        ))
+
+        self.nombres = sorted(self._id_por_nombre)
+        self.asignaturas = sorted(self._por_asignatura)
+        self.estudiantes = self.df.drop_duplicates("id_estudiante")[
+            ["id_estudiante", "nombre_estudiante", "aula"]
+        ]
+
+        self.resumen_estudiante = self.df.groupby("id_estudiante").agg(
+            nota_promedio=("nota", "mean"),
+            nota_max=("nota", "max"),
+            nota_min=("nota", "min"),
+            asignaturas=("asignatura", "nunique"),
+        )
+        self.resumen_asignatura = (
+            self.df.assign(asignatura=asignaturas)
+            .groupby("asignatura")
+            .agg(nota_promedio=("nota", "mean"), estudiantes=("id_estudiante", "nunique"))
+        )
+        self.resumen = None if self.df.empty else dict(
+            total_students=self.df["id_estudiante"].nunique(),
+            average_score=notas.mean(),
+            highest_score=notas.max(),
+            lowest_score=notas.min(),
+            subjects=self.df["asignatura"].nunique(),
+        )
+
+    def _filas(self, posiciones):
+        if posiciones is None:
+            return self.df.iloc[:0]
+        return self.df.iloc[posiciones]
+
+    def id_por_nombre(self, nombre):
+        return self._id_por_nombre.get(str(nombre))
+
+    def registros_estudiante(self, id_estudiante):
+        return self._filas(self._por_id.get(int(id_estudiante)))
+
+    def registros_asignatura(self, asignatura):
+        return self._filas(self._por_asignatura.get(str(asignatura)))
+
+    def estudiantes_asignatura(self, asignatura):
+        filas = self.registros_asignatura(asignatura)
+        return filas.drop_duplicates("id_estudiante")[["id_estudiante", "nombre_estudiante", "aula"]]
+
+    def promedio_asignatura(self, asignatura):
+        if str(asignatura) not in self.resumen_asignatura.index:
+            return np.nan
+        return self.resumen_asignatura.at[str(asignatura), "nota_promedio"]
+
+    def resumen_de(self, id_estudiante):
+        # fila de resumen_estudiante (Series) o None si no tiene registros
+        try:
+            return self.resumen_estudiante.loc[int(id_estudiante)]
+        except KeyError:
+            return None
+
@@ -0,0 +1,62 @@
+# core/lexico.py
+
+import re
+
+
+def _trie_regex(palabras):
+    # alternancia en forma de trie: en cada posicion del texto el motor
+    # solo prueba las ramas que comparten el prefijo ya leido
+    trie = {}
+    for p in palabras:
+        nodo = trie
+        for c in p:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = True
+
+    def _rx(nodo):
+        fin = "" in nodo
+        ramas = [re.escape(c) + _rx(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        if fin:
+            # greedy: primero la continuacion mas larga, luego la palabra corta
+            return "(?:" + cuerpo + ")?" if len(ramas) == 1 else cuerpo + "?"
+        return cuerpo
+
+    return _rx(trie)
+
+
+class Lexico:
+    """
+    Cuenta en una sola pasada las apariciones de cada palabra de un lexico.
+
+    contar(texto).get(p, 0) es identico a texto.count(p): subcadenas, sin
+    solapamiento para una misma palabra, pero palabras distintas pueden
+    solaparse ("interés" dentro de "desinterés"). Solo se devuelven las
+    palabras encontradas.
+    """
+
+    def __init__(self, palabras):
+        self.palabras = list(dict.fromkeys(palabras))
+
+        # lookahead: una coincidencia (la mas larga) por cada posicion del texto
+        self.patron = re.compile("(?=(" + _trie_regex(self.palabras) + "))")
+
+        # palabras que empiezan en la misma posicion son prefijos de la mas larga
+        self.prefijos = {
+            p: [q for q in self.palabras if p.startswith(q)]
+            for p in self.palabras
+        }
+
+    def contar(self, texto):
+        conteo = {}
+        fin = {}
+        for m in self.patron.finditer(texto):
+            i = m.start()
+            for q in self.prefijos[m.group(1)]:
+                if i >= fin.get(q, 0):
+                    conteo[q] = conteo.get(q, 0) + 1
+                    fin[q] = i + len(q)
+        return conteo
+
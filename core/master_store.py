@@ -0,0 +1,131 @@
+# core/master_store.py
+#
+# Dataset maestro particionado por periodo:
+#
+#   datasets/master/anio_academico=2025-2026/semestre=1/master.csv
+#   datasets/master/anio_academico=2025-2026/semestre=1/particion.json
+#   datasets/master/catalogo.json
+#
+# particion.json (filas, columnas, fecha y duracion del build) es la fuente
+# de verdad de cada periodo; catalogo.json es el resumen de todas, que se
+# regenera despues de cada build. Cada archivo se escribe en un temporal del
+# proceso y se mueve con os.replace: dos builds a la vez no comparten
+# temporal. Los masters planos anteriores (df_master_<anio>_<sem>.csv) se
+# siguen leyendo si no hay particiones.
+
+import glob
+import json
+import os
+import time
+
+import pandas as pd
+
+MASTER_DIR = "datasets/master"
+ARCHIVO = "master.csv"
+META = "particion.json"
+CATALOGO = "catalogo.json"
+
+
+def ruta_particion(anio_academico, semestre, base=MASTER_DIR):
+    return os.path.join(base, f"anio_academico={anio_academico}", f"semestre={semestre}", ARCHIVO)
+
+
+def _escribir_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def catalogo(base=MASTER_DIR):
+    """
+    Particiones disponibles, ordenadas por periodo: una fila por particion
+    con anio_academico, semestre, filas, construido, segundos y path.
+    """
+    filas = []
+    for meta_path in glob.glob(os.path.join(base, "anio_academico=*", "semestre=*", META)):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        meta["path"] = os.path.join(os.path.dirname(meta_path), ARCHIVO)
+        if os.path.exists(meta["path"]):
+            filas.append(meta)
+    cols = ["anio_academico", "semestre", "filas", "construido", "segundos", "path"]
+    df = pd.DataFrame(filas, columns=cols + ["columnas"])
+    return df.sort_values(["anio_academico", "semestre"], ignore_index=True)
+
+
+def guardar_particion(df, anio_academico, semestre, segundos=None, base=MASTER_DIR):
+    path = ruta_particion(anio_academico, semestre, base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # archivo completo y despues la metadata: si hay meta, el csv esta entero
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return registrar_particion(anio_academico, semestre, len(df), list(df.columns), segundos, base)
+
+
+def registrar_particion(anio_academico, semestre, filas, columnas, segundos=None, base=MASTER_DIR):
+    # para un master.csv ya escrito en su lugar (p.ej. por el build por bloques)
+    path = ruta_particion(anio_academico, semestre, base)
+    _escribir_json(os.path.join(os.path.dirname(path), META), {
+        "anio_academico": anio_academico,
+        "semestre": semestre,
+        "filas": filas,
+        "columnas": columnas,
+        "construido": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "segundos": None if segundos is None else round(segundos, 3),
+    })
+    actualizar_catalogo(base)
+    return path
+
+
+def actualizar_catalogo(base=MASTER_DIR):
+    # catalogo.json desde los particion.json (tambien al terminar build_many:
+    # con builds en paralelo, el ultimo en escribir puede no ver a otro)
+    cat = catalogo(base).drop(columns=["path", "columnas"])
+    _escribir_json(os.path.join(base, CATALOGO), cat.to_dict(orient="records"))
+
+
+def _legacy(anio_academico, semestre, base):
+    # masters planos de antes del particionado
+    archivos = sorted(glob.glob(os.path.join(base, "df_master_*_*.csv")))
+    if anio_academico is not None:
+        patron = f"df_master_{anio_academico}_{'' if semestre is None else semestre}"
+        archivos = [a for a in archivos if os.path.basename(a).startswith(patron)]
+    elif archivos:
+        archivos = archivos[-1:]
+    return archivos
+
+
+def leer_master(anio_academico=None, semestre=None, columnas=None, base=MASTER_DIR):
+    """
+    Lee solo las particiones pedidas y solo las columnas pedidas.
+
+    Sin anio_academico ni semestre: el periodo mas reciente. Con solo
+    anio_academico: todos sus semestres. Cada fila lleva anio_academico y
+    semestre de su particion.
+    """
+    cat = catalogo(base)
+    if anio_academico is not None:
+        cat = cat[cat["anio_academico"] == anio_academico]
+    if semestre is not None:
+        cat = cat[cat["semestre"] == semestre]
+    if anio_academico is None and semestre is None:
+        cat = cat.tail(1)
+
+    usecols = None if columnas is None else lambda c: c in columnas
+    partes = [
+        pd.read_csv(p.path, usecols=usecols).assign(
+            anio_academico=p.anio_academico, semestre=p.semestre
+        )
+        for p in cat.itertuples()
+    ]
+    if not partes:
+        partes = [pd.read_csv(a, usecols=usecols) for a in _legacy(anio_academico, semestre, base)]
+    if not partes:
+        raise FileNotFoundError("No hay dataset maestro para el periodo pedido")
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
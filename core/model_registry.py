@@ -0,0 +1,389 @@
+# core/model_registry.py
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# artefacto: payload joblib sin comprimir (los arrays se pueden abrir con
+# memory mapping) + un header JSON pequeño con version y checksum.
+# El payload se guarda con su checksum en el nombre (<path>.<sha256[:16]>)
+# y el header indica cual es: reemplazar el header es el unico paso que
+# cambia el artefacto, asi que un lector ve el anterior o el nuevo entero
+MODEL_PATH = "modelo_riesgo.joblib"
+LEGACY_PATH = "modelo_riesgo.pkl"
+
+# versiones publicadas por re-entrenamiento; ACTIVO contiene el nombre de la
+# version en uso y solo se reemplaza (os.replace) con el artefacto completo
+MODELOS_DIR = "modelos"
+ACTIVO_PATH = os.path.join(MODELOS_DIR, "ACTIVO")
+ESTADO_PATH = os.path.join(MODELOS_DIR, "entrenamiento.json")
+# flock exclusivo mientras hay un trabajo en curso, entre todos los procesos
+# (servidores de streamlit, scripts); el SO lo suelta si el proceso muere
+LOCK_ENTRENAMIENTO = os.path.join(MODELOS_DIR, "entrenamiento.lock")
+MAX_VERSIONES = 3
+
+FORMATO = "modelo-riesgo"
+VERSION_FORMATO = 1
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_modelo = None
+_header = None
+_path = None
+
+_trabajo = None
+_lock_trabajo = None
+
+
+def ruta_header(path=MODEL_PATH):
+    return f"{path}.meta.json"
+
+
+def ruta_payload(path, header):
+    return os.path.join(os.path.dirname(path), header["payload"])
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def guardar_artefacto(model_data, path=MODEL_PATH):
+    # payload completo con nombre propio y despues el header (os.replace):
+    # nunca queda un header apuntando a un payload a medias
+    import joblib
+
+    anterior = leer_header(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(model_data, tmp)
+
+    sha = _sha256(tmp)
+    header = {
+        "formato": FORMATO,
+        "version": VERSION_FORMATO,
+        "payload": f"{os.path.basename(path)}.{sha[:16]}",
+        "sha256": sha,
+        "bytes": os.path.getsize(tmp),
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    os.replace(tmp, ruta_payload(path, header))
+
+    tmp_header = f"{ruta_header(path)}.{os.getpid()}.tmp"
+    with open(tmp_header, "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_header, ruta_header(path))
+
+    _limpiar_payloads(path, [header, anterior])
+    return header
+
+
+def _limpiar_payloads(path, conservar):
+    # se conserva tambien el payload anterior: un lector que acaba de leer
+    # el header viejo todavia puede estar abriendolo
+    nombres = {h.get("payload") for h in conservar if h}
+    directorio = os.path.dirname(path) or "."
+    patron = re.compile(re.escape(os.path.basename(path)) + r"\.[0-9a-f]{16}$")
+    for f in os.listdir(directorio):
+        if patron.match(f) and f not in nombres:
+            try:
+                os.remove(os.path.join(directorio, f))
+            except OSError:
+                pass
+
+
+def leer_header(path=MODEL_PATH):
+    try:
+        with open(ruta_header(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def verificar_artefacto(path=MODEL_PATH, checksum=True):
+    # valida sin deserializar: header, tamaño y (opcional) sha256 del payload
+    header = leer_header(path)
+    if header is None or header.get("formato") != FORMATO:
+        return None
+    if header.get("version", 0) > VERSION_FORMATO or "payload" not in header:
+        return None
+    payload = ruta_payload(path, header)
+    if not os.path.exists(payload) or os.path.getsize(payload) != header.get("bytes"):
+        return None
+    if checksum and _sha256(payload) != header.get("sha256"):
+        return None
+    return header
+
+
+def cargar_artefacto(path=MODEL_PATH, mmap=True, header=None):
+    # con mmap_mode="r" los arrays grandes quedan respaldados por el archivo
+    # y los procesos de streamlit comparten esas paginas. header: el ya
+    # verificado, para no abrir uno publicado despues
+    import joblib
+
+    header = header or leer_header(path)
+    if header is None:
+        raise FileNotFoundError(f"No hay un modelo en {path}")
+    return joblib.load(ruta_payload(path, header), mmap_mode="r" if mmap else None)
+
+
+def _migrar_legacy(path):
+    # modelo_riesgo.pkl (pickle plano) -> artefacto con header
+    if not os.path.exists(LEGACY_PATH):
+        return None
+    try:
+        with open(LEGACY_PATH, "rb") as f:
+            model_data = pickle.load(f)
+    except (EOFError, pickle.UnpicklingError):
+        log.warning("%s corrupto, se ignora", LEGACY_PATH)
+        return None
+    log.info("migrando %s a %s", LEGACY_PATH, path)
+    return guardar_artefacto(model_data, path)
+
+
+def _escribir_json(path, data):
+    # tmp por proceso: dos procesos que publican no comparten el temporal
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def ruta_activa():
+    # version publicada en ACTIVO; si no hay, el artefacto base
+    try:
+        with open(ACTIVO_PATH, encoding="utf-8") as f:
+            nombre = f.read().strip()
+    except FileNotFoundError:
+        return MODEL_PATH
+    return os.path.join(MODELOS_DIR, nombre) if nombre else MODEL_PATH
+
+
+def activar(path):
+    tmp = f"{ACTIVO_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path))
+    os.replace(tmp, ACTIVO_PATH)
+
+
+def _podar(activo):
+    # deja las MAX_VERSIONES mas recientes; otros procesos que aun tengan
+    # abierta una version vieja la siguen leyendo hasta cerrarla
+    # (cada version es su header y su payload, <nombre>.meta.json y <nombre>.<sha>)
+    archivos = os.listdir(MODELOS_DIR)
+    versiones = sorted(
+        f[:-len(".meta.json")] for f in archivos
+        if f.startswith("modelo_riesgo-") and f.endswith(".joblib.meta.json")
+    )
+    for nombre in versiones[:-MAX_VERSIONES]:
+        if nombre == os.path.basename(activo):
+            continue
+        for f in archivos:
+            if not f.startswith(f"{nombre}."):
+                continue
+            try:
+                os.remove(os.path.join(MODELOS_DIR, f))
+            except OSError:
+                pass
+
+
+def publicar_modelo(model_data):
+    # nueva version completa en disco y despues el cambio atomico de ACTIVO
+    os.makedirs(MODELOS_DIR, exist_ok=True)
+    version = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    path = os.path.join(MODELOS_DIR, f"modelo_riesgo-{version}.joblib")
+    guardar_artefacto(model_data, path)
+    activar(path)
+    _podar(path)
+    return path
+
+
+def obtener_modelo(entrenar=None):
+    """
+    Devuelve el modelo NLP activo; cada version se deserializa una sola vez
+    por proceso.
+
+    Si ACTIVO apunta a una version nueva, se carga y reemplaza a la anterior.
+    entrenar: funcion sin argumentos que devuelve (clf, tfidf, vec); solo se
+    usa si no existe ningun artefacto valido ni modelo legacy que migrar. El
+    legacy solo se migra si no existe ningun artefacto: uno invalido se
+    re-entrena.
+    """
+    global _modelo, _header, _path
+    path = ruta_activa()
+    if _modelo is not None and _path == path:
+        return _modelo
+
+    with _lock:
+        path = ruta_activa()
+        if _modelo is not None and _path == path:
+            return _modelo
+
+        header = verificar_artefacto(path)
+        if header is None:
+            if _modelo is not None:
+                # version activa ilegible: se sigue sirviendo la anterior
+                log.warning("artefacto invalido en %s, se mantiene %s", path, _path)
+                return _modelo
+            activa, path = path, MODEL_PATH
+            header = verificar_artefacto(path)
+            if header is None and not any(os.path.exists(ruta_header(p)) for p in (activa, path)):
+                header = _migrar_legacy(path)
+        if header is None:
+            if entrenar is None:
+                raise FileNotFoundError(f"No hay un modelo valido en {path}")
+            path = publicar_modelo(entrenar())
+            header = leer_header(path)
+
+        _modelo = cargar_artefacto(path, header=header)
+        _header = header
+        _path = path
+        return _modelo
+
+
+def huella_activa():
+    # checksum del header: identifica el modelo sin leer el payload
+    if _header is not None:
+        return _header["sha256"]
+    header = leer_header(ruta_activa())
+    return header["sha256"] if header else None
+
+
+def invalidar():
+    # el proximo obtener_modelo vuelve a leer el artefacto
+    global _modelo, _header, _path
+    with _lock:
+        _modelo = None
+        _header = None
+        _path = None
+
+
+# Re-entrenamiento en segundo plano
+
+def _entrenar_y_publicar(entrenar):
+    # corre en un proceso aparte: no comparte el GIL con streamlit
+    path = publicar_modelo(entrenar())
+    return os.path.basename(path)
+
+
+def _tomar_lock_trabajo():
+    # True si este proceso puede lanzar el trabajo; sin fcntl (Windows) solo
+    # cuenta el trabajo de este proceso
+    global _lock_trabajo
+    if fcntl is None:
+        return True
+    f = open(LOCK_ENTRENAMIENTO, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return False
+    _lock_trabajo = f
+    return True
+
+
+def _soltar_lock_trabajo():
+    # se saca de la global antes de cerrar: otro hilo puede tomar el lock
+    # apenas se cierra el archivo
+    global _lock_trabajo
+    f, _lock_trabajo = _lock_trabajo, None
+    if f is not None:
+        f.close()
+
+
+def _al_terminar(fut):
+    estado = estado_entrenamiento()
+    estado["fin"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    try:
+        estado["version"] = fut.result()
+        estado["estado"] = "terminado"
+    except Exception as e:
+        estado["estado"] = "error"
+        estado["error"] = repr(e)
+        log.exception("fallo el re-entrenamiento")
+    # el estado final antes de soltar el lock: quien lo tome despues ya lo ve
+    try:
+        _escribir_json(ESTADO_PATH, estado)
+    finally:
+        _soltar_lock_trabajo()
+
+
+def iniciar_entrenamiento(entrenar):
+    """
+    Lanza el re-entrenamiento en un proceso en segundo plano.
+
+    Mientras tanto obtener_modelo sigue devolviendo la version activa; al
+    terminar se publica la nueva y las paginas la toman en su siguiente
+    ejecucion. Si ya hay un trabajo en curso, en este o en otro proceso, no
+    se lanza otro y se devuelve su estado.
+    """
+    global _trabajo
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _lock:
+        if _trabajo is not None and not _trabajo.done():
+            return estado_entrenamiento()
+
+        os.makedirs(MODELOS_DIR, exist_ok=True)
+        if not _tomar_lock_trabajo():
+            # otro proceso tiene un trabajo en curso (entrenamiento.json es suyo)
+            return estado_entrenamiento()
+        estado = {
+            "estado": "en_curso",
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+        }
+        try:
+            _escribir_json(ESTADO_PATH, estado)
+
+            # un proceso nuevo por trabajo ("spawn": sin heredar hilos de streamlit)
+            executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+            _trabajo = executor.submit(_entrenar_y_publicar, entrenar)
+        except Exception:
+            _soltar_lock_trabajo()
+            raise
+        _trabajo.add_done_callback(_al_terminar)
+        executor.shutdown(wait=False)
+        return estado
+
+
+def estado_entrenamiento():
+    # lo escribe el proceso que lanzo el trabajo; lo leen todas las paginas
+    try:
+        with open(ESTADO_PATH, encoding="utf-8") as f:
+            estado = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"estado": "sin_trabajos"}
+
+    if estado.get("estado") == "en_curso" and not _proceso_vivo(estado.get("pid")):
+        # el servidor que lanzo el trabajo ya no existe
+        estado["estado"] = "interrumpido"
+    return estado
+
+
+def _proceso_vivo(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
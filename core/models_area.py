@@ -1,13 +1,9 @@
 from core.nlp import (
     limpiar_texto,
     quitar_acentos,
-    score_keywords
-)
-from core.config import (
-    PALABRAS_CIENCIA,
-    PALABRAS_NUMERO,
-    PALABRAS_SOCIAL,
-    MODIFICADORES,
+    SCORER_CIENCIA,
+    SCORER_NUMERO,
+    SCORER_SOCIAL,
 )
 
 
@@ -19,8 +15,8 @@ def calc_scores(obs_list):
     texto = limpiar_texto(texto)
     texto = quitar_acentos(texto)
 
-    sc = score_keywords(texto, PALABRAS_CIENCIA, MODIFICADORES)
-    sn = score_keywords(texto, PALABRAS_NUMERO, MODIFICADORES)
-    ss = score_keywords(texto, PALABRAS_SOCIAL, MODIFICADORES)
+    sc = SCORER_CIENCIA.score(texto)
+    sn = SCORER_NUMERO.score(texto)
+    ss = SCORER_SOCIAL.score(texto)
 
     return max(0, sc), max(0, sn), max(0, ss)
\ No newline at end of file
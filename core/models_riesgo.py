@@ -1,10 +1,14 @@
 import math
+import numpy as np
+import pandas as pd
 from core.nlp import puntaje_ambiente
 
-def calcular_riesgo(row, modelo_nlp):
+def calcular_riesgo(row, modelo_nlp, F=None):
+    # F puede venir precalculado con puntaje_ambiente_batch
     A = row["asistencia"]
     N = row["nota_promedio"]
-    F = puntaje_ambiente(row["observaciones"], modelo_nlp)
+    if F is None:
+        F = puntaje_ambiente(row["observaciones"], modelo_nlp)
     CS = row['CS']
 
     try:
@@ -28,3 +32,47 @@ def calcular_riesgo(row, modelo_nlp):
         )
 
     return round(Rd, 3), round(F, 3)
+
+
+def calcular_riesgo_frame(df):
+    """
+    calcular_riesgo para todo el DataFrame a la vez.
+
+    Usa las columnas asistencia, nota_promedio, F y CS (F ya calculado).
+    Devuelve un DataFrame con Rd y F redondeados, con el mismo indice que df.
+    """
+    A = pd.to_numeric(df["asistencia"], errors="coerce").to_numpy(dtype=float)
+    N = pd.to_numeric(df["nota_promedio"], errors="coerce").to_numpy(dtype=float)
+    F = pd.to_numeric(df["F"], errors="coerce").to_numpy(dtype=float)
+    CS = pd.to_numeric(df["CS"], errors="coerce").to_numpy(dtype=float)
+
+    # max(0, x) de python devuelve 0 cuando x es NaN
+    brecha = 75 - N
+    brecha = np.where(brecha > 0, brecha, 0.0)
+
+    has_cs = ~np.isnan(CS)
+
+    with np.errstate(invalid="ignore"):
+        rd_cs = (
+            0.25 * (1 - A / 100) +
+            0.25 * brecha / 100 +
+            0.25 * (1 - F) +
+            0.25 * (1 - CS)
+        )
+        # sin formulario: tres componentes con peso igual
+        rd_sin = (
+            (1/3) * (1 - A / 100) +
+            (1/3) * brecha / 100 +
+            (1/3) * (1 - F)
+        )
+
+    Rd = np.where(has_cs, rd_cs, rd_sin)
+
+    # round() de python (redondeo decimal exacto), no np.round
+    return pd.DataFrame(
+        {
+            "Rd": [round(x, 3) for x in Rd.tolist()],
+            "F": [round(x, 3) for x in F.tolist()],
+        },
+        index=df.index,
+    )
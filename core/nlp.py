@@ -1,27 +1,36 @@
-import re
-import pickle
 import os
-import pandas as pd
-from scipy.sparse import hstack
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.calibration import CalibratedClassifierCV
-from sklearn.svm import LinearSVC
-from sklearn.model_selection import train_test_split
-from core.config import PALABRAS_POS, PALABRAS_NEG
-from nltk.corpus import stopwords
-import nltk
+import re
 import unicodedata
+from functools import lru_cache
 
-MODEL_PATH = "modelo_riesgo.pkl"
+import numpy as np
+
+from core.config import (
+    PALABRAS_POS,
+    PALABRAS_NEG,
+    PALABRAS_CIENCIA,
+    PALABRAS_NUMERO,
+    PALABRAS_SOCIAL,
+    MODIFICADORES,
+    RIESGO_EXPR,
+)
+from core.lexico import Lexico
+from core import model_registry
+from core.model_registry import MODEL_PATH
+
+# pandas, scipy y sklearn se importan dentro de las funciones que los usan:
+# importar este modulo no debe pagar el costo de entrenamiento
+
+# lista de stopwords de NLTK (spanish) empaquetada con el repo, sin descargas
+STOPWORDS_PATH = os.path.join(os.path.dirname(__file__), "stopwords_es.txt")
+
+TRAIN_PATH = "datasets/nlp_observaciones_entrenamiento.csv"
+
+
+def cargar_stopwords_es():
+    with open(STOPWORDS_PATH, encoding="utf-8") as f:
+        return [w.strip() for w in f if w.strip()]
 
-# deteccion de pickle corrupto y lo borra
-if os.path.exists(MODEL_PATH):
-    try:
-        with open(MODEL_PATH, "rb") as f:
-            _ = pickle.load(f)  # intenta leer
-    except (EOFError, pickle.UnpicklingError):
-        os.remove(MODEL_PATH)
 
 def limpiar_texto(t):
     if not isinstance(t, str):
@@ -39,29 +48,71 @@ def quitar_acentos(texto):
     )
 
 
+# compilado una vez: todos los conteos de extraer_features en una sola pasada
+LEXICO_FEATURES = Lexico(PALABRAS_POS + PALABRAS_NEG)
+
+# plantilla con las claves en el orden original y valor 0
+_FEATS_BASE = {f"pos_{p}": 0 for p in PALABRAS_POS}
+_FEATS_BASE.update({f"neg_{n}": 0 for n in PALABRAS_NEG})
+_CLAVES = {}
+for _p in PALABRAS_POS:
+    _CLAVES.setdefault(_p, []).append(f"pos_{_p}")
+for _n in PALABRAS_NEG:
+    _CLAVES.setdefault(_n, []).append(f"neg_{_n}")
+_PESO_NEG = {n: PALABRAS_NEG.count(n) for n in PALABRAS_NEG}
+
+
 def extraer_features(texto):
     texto = texto.lower()
-    feats = {}
-    for p in PALABRAS_POS:
-        feats[f"pos_{p}"] = texto.count(p)
-    for n in PALABRAS_NEG:
-        feats[f"neg_{n}"] = texto.count(n)
+    feats = dict(_FEATS_BASE)
+    total_neg = 0
+    for p, c in LEXICO_FEATURES.contar(texto).items():
+        for clave in _CLAVES[p]:
+            feats[clave] = c
+        total_neg += c * _PESO_NEG.get(p, 0)
     feats["longitud"] = len(texto)
     feats["num_palabras"] = len(texto.split())
-    feats["ratio_neg"] = sum(feats[f"neg_{n}"] for n in PALABRAS_NEG) / (feats["num_palabras"] + 1)
+    feats["ratio_neg"] = total_neg / (feats["num_palabras"] + 1)
     return feats
 
 
 def cargar_modelo_nlp():
-    nltk.download("stopwords", quiet=True)
+    # un solo modelo por proceso; el registro valida el artefacto por checksum
+    return model_registry.obtener_modelo(entrenar=entrenar_modelo_nlp)
+
+
+def _entrenador_activo():
+    # re-entrenar conserva el motor del modelo activo (TF-IDF + SVM u online)
+    from core.nlp_online import entrenar_modelo_online, es_modelo_online
+
+    return entrenar_modelo_online if es_modelo_online(cargar_modelo_nlp()) else entrenar_modelo_nlp
+
+
+def reentrenar_modelo_nlp():
+    # sincrono: entrena, publica una version nueva y la devuelve
+    model_registry.publicar_modelo(_entrenador_activo()())
+    return cargar_modelo_nlp()
+
 
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            return pickle.load(f)
+def reentrenar_en_segundo_plano():
+    return model_registry.iniciar_entrenamiento(_entrenador_activo())
 
-    STOPWORDS_ES = stopwords.words("spanish")
 
-    df_train = pd.read_csv("datasets/nlp_observaciones_entrenamiento.csv")
+def estado_reentrenamiento():
+    return model_registry.estado_entrenamiento()
+
+
+def entrenar_modelo_nlp(path=TRAIN_PATH):
+    import pandas as pd
+    from scipy.sparse import hstack
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.svm import LinearSVC
+
+    STOPWORDS_ES = cargar_stopwords_es()
+
+    df_train = pd.read_csv(path)
     df_train["texto"] = df_train["texto"].astype(str).apply(limpiar_texto)
     textos = df_train["texto"].tolist()
     y = df_train["label"].values
@@ -83,14 +134,13 @@ def cargar_modelo_nlp():
     clf = CalibratedClassifierCV(base, cv=3)
     clf.fit(X, y)
 
-    model_data = (clf, tfidf, vec)
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model_data, f)
-
-    return model_data
+    return (clf, tfidf, vec)
 
 
 def puntaje_ambiente(texto, modelo_nlp=None):
+    import pandas as pd
+    from scipy.sparse import hstack
+
     if not texto or pd.isna(texto) or modelo_nlp is None:
         return 0.5
 
@@ -103,7 +153,175 @@ def puntaje_ambiente(texto, modelo_nlp=None):
 
     return float(clf.predict_proba(X)[0][1])
 
+
+def puntaje_ambiente_batch(textos, modelo_nlp=None):
+    # misma salida que puntaje_ambiente pero con un solo predict_proba para toda la lista
+    import pandas as pd
+    from scipy.sparse import hstack
+
+    textos = list(textos)
+    scores = np.full(len(textos), 0.5)
+    if modelo_nlp is None:
+        return scores
+
+    idx = [i for i, t in enumerate(textos) if t and not pd.isna(t)]
+    if not idx:
+        return scores
+
+    limpios = [limpiar_texto(textos[i]) for i in idx]
+    clf, tfidf, vec = modelo_nlp
+
+    X_tfidf = tfidf.transform(limpios)
+    X_manual = vec.transform([extraer_features(t) for t in limpios])
+    X = hstack([X_tfidf, X_manual]).tocsr()
+
+    scores[idx] = clf.predict_proba(X)[:, 1]
+    return scores
+
+def _normalizar(texto):
+    if not isinstance(texto, str):
+        return ""
+    return quitar_acentos(texto.lower())
+
+
+def _unir(textos):
+    # concatena los textos normalizados con "\n" (no es caracter de palabra,
+    # asi que \b se comporta igual que en los bordes de cada texto)
+    textos = [_normalizar(t) for t in textos]
+    largos = np.fromiter((len(t) + 1 for t in textos), dtype=np.int64, count=len(textos))
+    inicios = np.concatenate([[0], np.cumsum(largos)[:-1]]).astype(np.int64)
+    return "\n".join(textos), inicios
+
+
+class KeywordScorer:
+    """
+    Version precompilada de score_keywords para una lista fija de palabras.
+
+    Todas las palabras van en una sola alternancia \b(...)\b y los
+    modificadores en otra; score_many puntua una lista de textos con un solo
+    recorrido sobre su concatenacion.
+    """
+
+    VENTANA = 15
+
+    def __init__(self, palabras, modificadores=None):
+        normalizadas = [quitar_acentos(p.lower()) for p in palabras]
+        for p in normalizadas:
+            if not re.fullmatch(r"\w+", p):
+                raise ValueError(f"KeywordScorer solo admite palabras sueltas: {p!r}")
+
+        # una palabra repetida en la lista cuenta tantas veces como aparezca
+        self.pesos = {}
+        for p in normalizadas:
+            self.pesos[p] = self.pesos.get(p, 0) + 1
+
+        alternativas = "|".join(re.escape(p) for p in sorted(self.pesos, key=len, reverse=True))
+        self.patron = re.compile(r"\b(?:" + alternativas + r")\b") if self.pesos else None
+
+        # los modificadores se buscan tal cual, igual que en score_keywords
+        self.mod_patron = (
+            re.compile("|".join(re.escape(m) for m in modificadores))
+            if modificadores else None
+        )
+
+    def _con_modificador(self, texto, inicio, pos):
+        start = max(inicio, pos - self.VENTANA)
+        return self.mod_patron.search(texto, start, pos) is not None
+
+    def score(self, texto):
+        texto = _normalizar(texto)
+        total = 0
+        if self.patron is None:
+            return total
+        for m in self.patron.finditer(texto):
+            w = self.pesos[m.group()]
+            total += w
+            if self.mod_patron and self._con_modificador(texto, 0, m.start()):
+                total += 0.5 * w  # ponderación extra
+        return total
+
+    def score_many(self, textos):
+        textos = list(textos)
+        if self.patron is None or not textos:
+            return np.zeros(len(textos))
+
+        unido, inicios = _unir(textos)
+        pos, pesos = [], []
+        for m in self.patron.finditer(unido):
+            w = self.pesos[m.group()]
+            pos.append(m.start())
+            pesos.append(w)
+
+        pos = np.asarray(pos, dtype=np.int64)
+        pesos = np.asarray(pesos, dtype=float)
+        idx = np.searchsorted(inicios, pos, side="right") - 1
+
+        if self.mod_patron is not None:
+            extra = np.fromiter(
+                (self._con_modificador(unido, inicios[i], p) for i, p in zip(idx, pos)),
+                dtype=bool, count=len(pos)
+            )
+            pesos = pesos + 0.5 * pesos * extra
+
+        return np.bincount(idx, weights=pesos, minlength=len(textos))
+
+
+class RiesgoScorer:
+    """
+    Version precompilada de score_riesgo: cuantas expresiones de riesgo
+    aparecen (como subcadena) en cada texto.
+    """
+
+    def __init__(self, riesgo_expr):
+        normalizadas = [quitar_acentos(r.lower()) for r in riesgo_expr]
+        self.pesos = {}
+        for r in normalizadas:
+            self.pesos[r] = self.pesos.get(r, 0) + 1
+        self.lexico = Lexico(list(self.pesos)) if self.pesos else None
+
+    def score(self, texto):
+        if self.lexico is None:
+            return 0
+        return sum(self.pesos[r] for r in self.lexico.contar(_normalizar(texto)))
+
+    def score_many(self, textos):
+        textos = list(textos)
+        out = np.zeros(len(textos), dtype=np.int64)
+        if self.lexico is None or not textos:
+            return out
+
+        unido, inicios = _unir(textos)
+        vistos = set()
+        for m in self.lexico.patron.finditer(unido):
+            i = int(np.searchsorted(inicios, m.start(), side="right") - 1)
+            for r in self.lexico.prefijos[m.group(1)]:
+                vistos.add((i, r))
+        for i, r in vistos:
+            out[i] += self.pesos[r]
+        return out
+
+
+SCORER_CIENCIA = KeywordScorer(PALABRAS_CIENCIA, MODIFICADORES)
+SCORER_NUMERO = KeywordScorer(PALABRAS_NUMERO, MODIFICADORES)
+SCORER_SOCIAL = KeywordScorer(PALABRAS_SOCIAL, MODIFICADORES)
+SCORER_RIESGO = RiesgoScorer(RIESGO_EXPR)
+
+
+@lru_cache(maxsize=32)
+def _keyword_scorer(palabras, modificadores):
+    return KeywordScorer(palabras, modificadores)
+
+
 def score_keywords(texto, palabras, modificadores=None):
+    try:
+        scorer = _keyword_scorer(tuple(palabras), tuple(modificadores) if modificadores else None)
+    except ValueError:
+        return _score_keywords_lento(texto, palabras, modificadores)
+    return scorer.score(texto)
+
+
+def _score_keywords_lento(texto, palabras, modificadores=None):
+    # listas con expresiones de varias palabras: recorrido palabra por palabra
 
     texto = quitar_acentos(texto.lower())
     palabras = [quitar_acentos(p.lower()) for p in palabras]
@@ -123,7 +341,10 @@ def score_keywords(texto, palabras, modificadores=None):
     return total
 
 
+@lru_cache(maxsize=32)
+def _riesgo_scorer(riesgo_expr):
+    return RiesgoScorer(riesgo_expr)
+
+
 def score_riesgo(texto, riesgo_expr):
-    texto = quitar_acentos(texto.lower())
-    riesgo_expr = [quitar_acentos(r.lower()) for r in riesgo_expr]
-    return sum(1 for r in riesgo_expr if r in texto)
\ No newline at end of file
+    return _riesgo_scorer(tuple(riesgo_expr)).score(texto)
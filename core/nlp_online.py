@@ -0,0 +1,119 @@
+# core/nlp_online.py
+#
+# Motor alternativo del puntaje de ambiente: features por hashing (sin
+# vocabulario que ajustar) + clasificador lineal online (SGD, log_loss).
+# Se entrena por bloques leidos del CSV, asi que el corpus no necesita caber
+# en memoria, y se actualiza solo con las filas nuevas.
+#
+# El modelo es la misma tupla (clf, vectorizador_texto, vec_manual) que usa
+# puntaje_ambiente, asi que se publica y se sirve por el mismo registro.
+
+import numpy as np
+
+from core import model_registry
+from core.nlp import TRAIN_PATH, cargar_stopwords_es, extraer_features, limpiar_texto
+
+N_FEATURES = 2 ** 18
+CHUNKSIZE = 10_000
+CLASES = np.array([0, 1])
+
+
+def crear_modelo_online(alpha=1e-3, random_state=0):
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import FunctionTransformer
+
+    # mismos tokens que el TF-IDF del motor principal
+    hasher = HashingVectorizer(
+        n_features=N_FEATURES,
+        ngram_range=(1, 2),
+        stop_words=cargar_stopwords_es(),
+        alternate_sign=False,
+        norm="l2",
+    )
+
+    # las claves de extraer_features son fijas: basta ajustar con un texto vacio;
+    # log1p deja longitud y conteos en una escala apta para SGD
+    vec = make_pipeline(
+        DictVectorizer(),
+        FunctionTransformer(np.log1p, accept_sparse=True),
+    )
+    vec.fit([extraer_features("")])
+
+    clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+    return (clf, hasher, vec)
+
+
+def es_modelo_online(modelo_nlp):
+    return hasattr(modelo_nlp[0], "partial_fit")
+
+
+def _matriz(modelo_nlp, textos):
+    from scipy.sparse import hstack
+
+    _, hasher, vec = modelo_nlp
+    textos = [limpiar_texto(t) for t in textos]
+    return hstack([hasher.transform(textos), vec.transform([extraer_features(t) for t in textos])]).tocsr()
+
+
+def actualizar_modelo_online(modelo_nlp, textos, labels):
+    # una pasada de SGD sobre un bloque; no toca el historico
+    clf = modelo_nlp[0]
+    clf.partial_fit(_matriz(modelo_nlp, textos), np.asarray(labels), classes=CLASES)
+    return modelo_nlp
+
+
+def _bloques(path, chunksize):
+    import pandas as pd
+
+    for bloque in pd.read_csv(path, chunksize=chunksize):
+        bloque = bloque.dropna(subset=["label"])
+        yield bloque["texto"].fillna("").astype(str).tolist(), bloque["label"].astype(int).to_numpy()
+
+
+def entrenar_modelo_online(path=TRAIN_PATH, chunksize=CHUNKSIZE, epocas=10, modelo_nlp=None, random_state=0):
+    """
+    Entrena (o continua entrenando) el motor online leyendo el CSV por bloques.
+
+    Cada epoca vuelve a recorrer el archivo; dentro de cada bloque las filas
+    se barajan. La memoria depende de chunksize, no del tamaño del corpus.
+    """
+    modelo_nlp = modelo_nlp or crear_modelo_online(random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    for _ in range(epocas):
+        for textos, y in _bloques(path, chunksize):
+            orden = rng.permutation(len(y))
+            actualizar_modelo_online(modelo_nlp, [textos[i] for i in orden], y[orden])
+    return modelo_nlp
+
+
+def actualizar_modelo_activo(path_nuevos, chunksize=CHUNKSIZE, epocas=1):
+    """
+    Aplica filas recien etiquetadas (CSV texto,label) al modelo online activo
+    y publica el resultado como una version nueva.
+    """
+    path_activo = model_registry.ruta_activa()
+    # copia en memoria (sin mmap): partial_fit modifica los coeficientes
+    modelo_nlp = model_registry.cargar_artefacto(path_activo, mmap=False)
+    if not es_modelo_online(modelo_nlp):
+        raise ValueError(f"El modelo activo ({path_activo}) no es el motor online")
+
+    modelo_nlp = entrenar_modelo_online(path_nuevos, chunksize, epocas, modelo_nlp=modelo_nlp)
+    return model_registry.publicar_modelo(modelo_nlp)
+
+
+if __name__ == "__main__":
+    # python -m core.nlp_online entrenar [csv]   -> publica un motor online nuevo
+    # python -m core.nlp_online actualizar csv   -> aplica filas nuevas al activo
+    import sys
+
+    accion = sys.argv[1] if len(sys.argv) > 1 else "entrenar"
+    if accion == "entrenar":
+        ruta = sys.argv[2] if len(sys.argv) > 2 else TRAIN_PATH
+        print(model_registry.publicar_modelo(entrenar_modelo_online(ruta)))
+    elif accion == "actualizar":
+        print(actualizar_modelo_activo(sys.argv[2]))
+    else:
+        sys.exit(f"accion desconocida: {accion}")
@@ -1,7 +1,9 @@
 import math
 
 
-def generar_perfil_textual(row):
+def generar_perfil_textual(row, incluir_observaciones=True):
+    # sin observaciones queda solo la oracion estructurada (las observaciones
+    # se codifican aparte en el almacen de embeddings)
     partes = []
 
     partes.append(
@@ -23,7 +25,7 @@ def generar_perfil_textual(row):
     if row["score_social"] > 0:
         partes.append("Destaca en habilidades sociales y comunicacion.")
 
-    if isinstance(row["observaciones"], str):
+    if incluir_observaciones and isinstance(row["observaciones"], str):
         partes.append("Observaciones relevantes: " + row["observaciones"])
 
     return " ".join(partes)
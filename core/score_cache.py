@@ -0,0 +1,121 @@
+# core/score_cache.py
+
+import hashlib
+import itertools
+import logging
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from core.model_registry import huella_activa
+from core.nlp import limpiar_texto, puntaje_ambiente_batch
+
+CACHE_PATH = "datasets/processed/cache_puntajes.pkl"
+
+# tope de entradas: al guardar se descartan las usadas hace mas tiempo
+# (textos que ya no estan en los datos: observaciones unidas que cambiaron)
+MAX_ENTRADAS = 200_000
+
+log = logging.getLogger(__name__)
+
+
+def huella_modelo():
+    # checksum del header del artefacto activo; cambia en cada re-entrenamiento
+    return huella_activa()
+
+
+def clave_texto(texto):
+    # el modelo solo ve el texto limpio, asi que ese es el contenido que se hashea
+    return hashlib.blake2b(limpiar_texto(texto).encode("utf-8"), digest_size=16).digest()
+
+
+class CachePuntajes:
+    """
+    Almacen en disco de puntajes de ambiente (F) por observacion.
+
+    Las claves son el hash del texto normalizado; el archivo guarda tambien la
+    huella del modelo con el que se calcularon, y si no coincide con la actual
+    las entradas se descartan. El dict esta en orden de uso (la ultima usada
+    al final), asi que pasado max_entradas se desalojan las primeras.
+    """
+
+    def __init__(self, path=CACHE_PATH, huella=None, max_entradas=MAX_ENTRADAS):
+        self.path = path
+        self.max_entradas = max_entradas
+        self.huella = huella if huella is not None else huella_modelo()
+        self.scores = {}
+        self.hits = 0
+        self.misses = 0
+        self.desalojados = 0
+        self._cambios = False
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except (EOFError, pickle.UnpicklingError):
+            log.warning("cache de puntajes corrupto, se ignora: %s", self.path)
+            return
+
+        if data.get("huella") == self.huella and self.huella is not None:
+            self.scores = data["scores"]
+        else:
+            self.desalojados = len(data.get("scores", {}))
+            self._cambios = True
+
+    def puntajes(self, textos, modelo_nlp=None):
+        # igual que puntaje_ambiente_batch, pero solo infiere los textos nuevos
+        textos = list(textos)
+        out = np.full(len(textos), 0.5)
+        if modelo_nlp is None:
+            return out
+
+        claves = {}
+        for i, t in enumerate(textos):
+            if t and not pd.isna(t):
+                claves.setdefault(clave_texto(t), []).append(i)
+
+        nuevas = [k for k in claves if k not in self.scores]
+        # las usadas pasan al final; el orden se guarda junto con las nuevas
+        for k in claves:
+            if k in self.scores:
+                self.scores[k] = self.scores.pop(k)
+        if nuevas:
+            scores = puntaje_ambiente_batch([textos[claves[k][0]] for k in nuevas], modelo_nlp)
+            self.scores.update(zip(nuevas, scores.tolist()))
+            self._cambios = True
+
+        self.misses += len(nuevas)
+        self.hits += len(claves) - len(nuevas)
+        for k, pos in claves.items():
+            out[pos] = self.scores[k]
+
+        return out
+
+    def guardar(self):
+        if self.huella is None or not self._cambios:
+            return
+        exceso = len(self.scores) - self.max_entradas
+        if exceso > 0:
+            for k in list(itertools.islice(self.scores, exceso)):
+                del self.scores[k]
+            self.desalojados += exceso
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"huella": self.huella, "scores": self.scores}, f)
+        os.replace(tmp, self.path)
+        self._cambios = False
+
+    def resumen(self):
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_desalojados": self.desalojados,
+            "cache_entradas": len(self.scores),
+        }
@@ -1,34 +1,263 @@
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="torch")
 
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.embedding_store import EmbeddingStore
+from core.perfil_textual import generar_perfil_textual
+from core.vector_index import cargar_indice, construir_indice, cuantizar, guardar_indice
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# modo de inferencia para nodos solo-CPU (apagado por defecto):
+#   SEMANTIC_CUANTIZAR=1             capas Linear cuantizadas a int8 (dinamico)
+#   SEMANTIC_HILOS=n                 maximo de hilos de torch por proceso
+#   SEMANTIC_VECTORES=float16|int8   formato de los vectores guardados
+# un valor invalido avisa y se usa el de por defecto, no rompe el import
+
+
+def _entero_env(nombre, defecto=0):
+    valor = os.environ.get(nombre, "").strip()
+    if not valor:
+        return defecto
+    try:
+        return max(0, int(valor))
+    except ValueError:
+        warnings.warn(f"{nombre}={valor!r} no es un entero; se usa {defecto}")
+        return defecto
+
+
+def _formato_env(nombre, defecto="float32"):
+    valor = os.environ.get(nombre, "").strip() or defecto
+    if valor not in ("float32", "float16", "int8"):
+        warnings.warn(f"{nombre}={valor!r} no es un formato valido; se usa {defecto}")
+        return defecto
+    return valor
+
+
+CUANTIZAR = os.environ.get("SEMANTIC_CUANTIZAR", "0").strip() == "1"
+HILOS = _entero_env("SEMANTIC_HILOS")
+FORMATO_VECTORES = _formato_env("SEMANTIC_VECTORES")
+
+# matriz de embeddings de areas (L2-normalizada), una por catalogo + modelo
+EMB_DIR = "datasets/processed/embeddings"
+
+# vector del estudiante: peso de la oracion estructurada frente al promedio
+# de sus observaciones
+PESO_PERFIL = 0.5
+
 _model = None
+_store = None
+_areas_cache = {}
+_indices_cache = {}
+
+def cargar_modelo(int8=False, hilos=0):
+    # torch se carga recien aqui, no al importar el modulo
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if hilos > 0:
+        torch.set_num_threads(hilos)
+    model = SentenceTransformer(MODEL_NAME, device="cpu" if int8 else None)
+    if int8:
+        # pesos int8 y activaciones cuantizadas al vuelo; sobre el mismo
+        # modelo (inplace) para no tener dos copias en memoria
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    return model
+
 
 def _get_model():
     global _model
     if _model is None:
-        _model = SentenceTransformer(MODEL_NAME)
+        _model = cargar_modelo(CUANTIZAR, HILOS)
     return _model
 
 
-def recomendar_areas(perfil_texto, df_areas, top_k=5):
+def preparar_areas(df_areas):
+    df_areas = df_areas.copy()
+    df_areas["texto_area"] = (
+        df_areas["nombre_area"].astype(str) + ". " +
+        df_areas["descripcion"].astype(str)
+    )
+    return df_areas
+
+
+def _modo():
+    # el modo de inferencia y el formato cambian los vectores guardados
+    return f"{MODEL_NAME}|{'int8' if CUANTIZAR else 'fp32'}|{FORMATO_VECTORES}"
+
+
+def _clave_areas(textos):
+    h = hashlib.sha256(_modo().encode("utf-8"))
+    for t in textos:
+        h.update(b"\x1f" + t.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def embeddings_areas(df_areas):
+    """
+    Embeddings de las areas, calculados una sola vez y guardados en .npy.
+
+    El archivo se identifica por el hash de los textos, de MODEL_NAME y del
+    modo de inferencia; si el catalogo cambia se genera uno nuevo (los
+    anteriores se conservan). Se abre con memory mapping, asi que los procesos
+    comparten la misma copia. Devuelve (vecs, escala), con vecs en
+    FORMATO_VECTORES y escala solo en int8.
+    """
+    textos = df_areas["texto_area"].astype(str).tolist()
+    clave = _clave_areas(textos)
+    if clave in _areas_cache:
+        return _areas_cache[clave]
+
+    path = os.path.join(EMB_DIR, f"areas_{clave}.npy")
+    path_escala = os.path.join(EMB_DIR, f"areas_{clave}.escala.npy")
+    if not os.path.exists(path):
+        emb = _get_model().encode(textos, normalize_embeddings=True, show_progress_bar=False)
+        datos, escala = cuantizar(emb, FORMATO_VECTORES)
+        os.makedirs(EMB_DIR, exist_ok=True)
+        # la escala antes que los vectores: si existe el .npy, existe todo
+        for destino, arr in ((path_escala, escala), (path, datos)):
+            if arr is None:
+                continue
+            tmp = f"{destino}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, destino)
+        # los embeddings e indices de catalogos anteriores no se borran: son
+        # chicos y otro proceso puede estar usandolos
+
+    escala = np.load(path_escala) if os.path.exists(path_escala) else None
+    _areas_cache.clear()
+    _areas_cache[clave] = (np.load(path, mmap_mode="r"), escala)
+    return _areas_cache[clave]
+
+
+def indice_areas(df_areas):
+    """
+    Indice de vecinos sobre los embeddings de las areas.
+
+    Catalogos chicos usan busqueda exacta; los grandes un IVF que se
+    construye una vez y se guarda junto al .npy del mismo catalogo.
+    """
+    areas_vecs, escala = embeddings_areas(df_areas)
+    clave = _clave_areas(df_areas["texto_area"].astype(str).tolist())
+    if clave in _indices_cache:
+        return _indices_cache[clave]
+
+    path = os.path.join(EMB_DIR, f"areas_{clave}.indice.npz")
+    if os.path.exists(path):
+        indice = cargar_indice(path)
+    else:
+        indice = construir_indice(areas_vecs, escala=escala)
+        if indice.tipo != "exacto":
+            guardar_indice(indice, path)
+
+    _indices_cache.clear()
+    _indices_cache[clave] = indice
+    return indice
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        clave = hashlib.sha256(_modo().encode("utf-8")).hexdigest()[:16]
+        _store = EmbeddingStore(os.path.join(EMB_DIR, f"observaciones_{clave}"), FORMATO_VECTORES)
+    return _store
+
+
+def _observaciones(row):
+    obs = row["observaciones"]
+    if not isinstance(obs, str):
+        return []
+    return [o.strip() for o in obs.split("|") if o.strip()]
+
+
+def vectores_estudiantes(df, batch_size=128):
+    """
+    Un vector normalizado por estudiante (fila de df).
+
+    Combina la oracion estructurada del perfil con el promedio de los
+    embeddings de sus observaciones. Cada observacion se codifica una sola
+    vez (EmbeddingStore); una observacion nueva cuesta un encode, no el
+    historial completo, y ningun texto pasa el limite de tokens del modelo.
+    """
     model = _get_model()
 
-    textos_areas = df_areas["texto_area"].astype(str).tolist()
+    def encode(textos):
+        return model.encode(textos, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
 
-    # codificar perfil y áreas en vectores de 384 dim
-    embeddings = model.encode([perfil_texto] + textos_areas, show_progress_bar=False)
+    perfiles = [generar_perfil_textual(row, incluir_observaciones=False) for _, row in df.iterrows()]
+    vecs = np.asarray(encode(perfiles), dtype=np.float32)
 
-    perfil_vec = embeddings[0:1]
-    areas_vecs = embeddings[1:]
+    obs = [_observaciones(row) for _, row in df.iterrows()]
+    largos = np.array([len(o) for o in obs], dtype=np.int64)
+    con_obs = largos > 0
+    if con_obs.any():
+        obs_vecs = _get_store().vectores([o for lista in obs for o in lista], encode)
+        inicios = np.concatenate([[0], np.cumsum(largos)[:-1]])
+        promedios = np.add.reduceat(obs_vecs, inicios[con_obs], axis=0) / largos[con_obs, None]
+        vecs[con_obs] = PESO_PERFIL * vecs[con_obs] + (1 - PESO_PERFIL) * promedios
 
-    scores = cosine_similarity(perfil_vec, areas_vecs)[0]
+    normas = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.where(normas > 0, normas, 1)
 
-    df_areas = df_areas.copy()
-    df_areas["afinidad"] = scores.clip(0, 1)
 
-    return df_areas.sort_values("afinidad", ascending=False).head(top_k)
+def _ranking(indice, vec, df_areas, top_k):
+    ids, scores = indice.buscar(vec, top_k)
+    validos = ids[0] >= 0
+
+    df_areas = df_areas.iloc[ids[0][validos]].copy()
+    df_areas["afinidad"] = scores[0][validos].clip(0, 1)
+    return df_areas
+
+
+def recomendar_areas(perfil_texto, df_areas, top_k=5):
+    indice = indice_areas(df_areas)
+
+    # solo se codifica el perfil; las areas ya estan normalizadas
+    perfil_vec = _get_model().encode(
+        [perfil_texto], normalize_embeddings=True, show_progress_bar=False
+    )[0]
+    return _ranking(indice, perfil_vec, df_areas, top_k)
+
+
+def recomendar_areas_estudiante(row, df_areas, top_k=5):
+    # igual que recomendar_areas pero con el vector combinado del estudiante
+    indice = indice_areas(df_areas)
+    vec = vectores_estudiantes(row.to_frame().T)[0]
+    return _ranking(indice, vec, df_areas, top_k)
+
+
+def recomendar_areas_batch(df, df_areas, top_k=3, batch_size=128):
+    """
+    Recomendacion de areas para toda la cohorte (una fila por estudiante).
+
+    Los vectores de estudiante (vectores_estudiantes) se buscan en el indice
+    de areas todos juntos. Devuelve, con el mismo indice que df, las columnas
+    area_1..k y afinidad_1..k.
+    """
+    indice = indice_areas(df_areas)
+    nombres = df_areas["nombre_area"].astype(str).to_numpy()
+    k = min(top_k, len(nombres))
+
+    out = pd.DataFrame(index=df.index)
+    if len(df) == 0 or k == 0:
+        return out
+
+    top, top_scores = indice.buscar(vectores_estudiantes(df, batch_size), k)
+    top_scores = top_scores.clip(0, 1)
+
+    # el IVF rellena con -1 si sus listas no alcanzan k candidatos
+    for j in range(k):
+        validos = top[:, j] >= 0
+        out[f"area_{j + 1}"] = np.where(validos, nombres[top[:, j]], None)
+        out[f"afinidad_{j + 1}"] = np.where(
+            validos, top_scores[:, j].astype(float).round(4), np.nan
+        )
+    return out
@@ -0,0 +1,169 @@
+# core/sql_store.py
+#
+# Copia indexada de los datasets de la escuela en SQLite (datasets/escuela.db)
+# para las consultas puntuales de las paginas: las observaciones de un
+# estudiante, los registros de una asignatura o de un periodo se leen por
+# indice en vez de filtrar el CSV completo con una mascara.
+#
+# Los CSV siguen siendo la fuente de verdad. Cada tabla guarda la firma
+# (mtime, tamaño) del CSV del que se importo; si el CSV cambio despues, la
+# tabla no se usa hasta volver a importar:
+#
+#   python -m core.sql_store importar [carpeta]
+#
+# Las consultas usan una conexion por hilo y carpeta, abierta una vez y en
+# autocommit: no se repiten PRAGMA ni CREATE en cada consulta, y ninguna
+# transaccion de lectura queda abierta entre consultas.
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from core.data_loader import DATASET, aplicar_plan, firma_archivo
+
+ARCHIVO = "escuela.db"
+TIMEOUT = 30
+CHUNKSIZE = 50_000
+
+# tabla de cada CSV y sus indices
+INDICES = {
+    "estudiantes.csv": [("id_estudiante",), ("nombre_estudiante",)],
+    "asignaturas.csv": [("nombre_asignatura",)],
+    "rendimiento.csv": [("id_estudiante",), ("asignatura",), ("año_academico", "semestre")],
+    "observaciones.csv": [("id_estudiante",), ("autor",)],
+    "areas_estudio.csv": [("id_area",)],
+}
+
+
+def ruta_db(base=DATASET):
+    return os.path.join(base, ARCHIVO)
+
+
+def tabla(nombre):
+    return os.path.splitext(nombre)[0]
+
+
+def _q(identificador):
+    return '"' + identificador.replace('"', '""') + '"'
+
+
+def _valor(v):
+    # sqlite3 no acepta escalares de numpy (id_estudiante viene como int32)
+    return v.item() if isinstance(v, np.generic) else v
+
+
+_hilo = threading.local()
+
+
+def conectar(base=DATASET):
+    # conexion de lectura del hilo para base (sqlite3 no comparte entre hilos)
+    conexiones = _hilo.__dict__.setdefault("conexiones", {})
+    path = ruta_db(base)
+    if path not in conexiones:
+        conexiones[path] = sqlite3.connect(path, timeout=TIMEOUT, isolation_level=None)
+    return conexiones[path]
+
+
+def _preparar(con):
+    # WAL queda guardado en el archivo: alcanza con fijarlo al importar
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("CREATE TABLE IF NOT EXISTS _importados (tabla TEXT PRIMARY KEY, firma TEXT)")
+
+
+def importar(base=DATASET, nombres=None):
+    """
+    Importa los CSV de base (todos los de INDICES por defecto) y crea sus
+    indices. Cada tabla se arma aparte y se reemplaza en una transaccion:
+    quien consulta mientras tanto ve la version anterior completa.
+    """
+    importados = []
+    with closing(sqlite3.connect(ruta_db(base), timeout=TIMEOUT)) as con:
+        _preparar(con)
+        for nombre in nombres or INDICES:
+            path = os.path.join(base, nombre)
+            if not os.path.exists(path):
+                continue
+            firma = firma_archivo(path)
+            t, nueva = tabla(nombre), f"_nueva_{tabla(nombre)}"
+            con.execute(f"DROP TABLE IF EXISTS {_q(nueva)}")
+            for bloque in pd.read_csv(path, chunksize=CHUNKSIZE):
+                bloque.to_sql(nueva, con, if_exists="append", index=False)
+
+            with con:
+                con.execute("BEGIN IMMEDIATE")
+                con.execute(f"DROP TABLE IF EXISTS {_q(t)}")
+                con.execute(f"ALTER TABLE {_q(nueva)} RENAME TO {_q(t)}")
+                for cols in INDICES.get(nombre, []):
+                    idx = f"idx_{t}_{'_'.join(cols)}"
+                    con.execute(
+                        f"CREATE INDEX {_q(idx)} ON {_q(t)} ({', '.join(_q(c) for c in cols)})"
+                    )
+                con.execute(
+                    "INSERT OR REPLACE INTO _importados VALUES (?, ?)", (t, json.dumps(firma))
+                )
+            importados.append(nombre)
+        con.execute("ANALYZE")
+    return importados
+
+
+def vigente(nombre, base=DATASET):
+    # la tabla existe y se importo de la version actual del CSV
+    path = os.path.join(base, nombre)
+    if not os.path.exists(ruta_db(base)) or not os.path.exists(path):
+        return False
+    try:
+        fila = conectar(base).execute(
+            "SELECT firma FROM _importados WHERE tabla = ?", (tabla(nombre),)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # base a medio crear, sin _importados todavia
+        return False
+    return fila is not None and json.loads(fila[0]) == firma_archivo(path)
+
+
+def consultar(nombre, filtros, columnas=None, base=DATASET):
+    """
+    Filas de la tabla de nombre (p.ej. "observaciones.csv") que cumplen
+    filtros: {columna: valor} o {columna: [valores]}, combinados con AND.
+    Devuelve las filas en el orden del CSV, con el plan de tipos aplicado.
+
+    Una lista de valores va a una tabla temporal de la conexion y se cruza
+    con un JOIN: no hay un parametro por valor (SQLite tiene un limite) y
+    el plan usa el indice de la columna igual que con un valor solo.
+    """
+    con = conectar(base)
+    joins, where, params = [], [], []
+    for n, (col, v) in enumerate(filtros.items()):
+        if not pd.api.types.is_list_like(v):
+            where.append(f"t.{_q(col)} = ?")
+            params.append(_valor(v))
+            continue
+        filtro = f"_filtro_{n}"
+        con.execute(f"CREATE TEMP TABLE IF NOT EXISTS {filtro} (v PRIMARY KEY)")
+        con.execute(f"DELETE FROM temp.{filtro}")
+        # PRIMARY KEY + OR IGNORE: un valor repetido no duplica filas
+        con.executemany(f"INSERT OR IGNORE INTO temp.{filtro} VALUES (?)", ((_valor(x),) for x in v))
+        joins.append(f"JOIN temp.{filtro} ON temp.{filtro}.v = t.{_q(col)}")
+    select = "t.*" if columnas is None else ", ".join(f"t.{_q(c)}" for c in columnas)
+    sql = f"SELECT {select} FROM {_q(tabla(nombre))} AS t " + " ".join(joins)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    df = pd.read_sql_query(sql + " ORDER BY t.rowid", con, params=params)
+    return aplicar_plan(df)
+
+
+if __name__ == "__main__":
+    # python -m core.sql_store importar [carpeta]   -> CSV de la carpeta a escuela.db
+    accion = sys.argv[1] if len(sys.argv) > 1 else "importar"
+    base = sys.argv[2] if len(sys.argv) > 2 else DATASET
+    if accion == "importar":
+        for nombre in importar(base):
+            print(f"{nombre} -> {ruta_db(base)}")
+    else:
+        sys.exit(f"accion desconocida: {accion}")
@@ -0,0 +1,236 @@
+# core/vector_index.py
+#
+# Indices de vecinos mas cercanos para embeddings L2-normalizados (el
+# producto punto es la similitud coseno). Dos implementaciones con la misma
+# interfaz:
+#
+#   IndiceExacto  recorre toda la matriz; es el que se usa en catalogos chicos
+#   IndiceIVF     k-means sobre los vectores y busqueda solo en las nprobe
+#                 listas mas cercanas a la consulta (nprobe = n_listas es exacto)
+#
+# construir_indice elige segun el tamaño; guardar_indice / cargar_indice
+# persisten cualquiera de los dos en un .npz.
+#
+# Los vectores se pueden guardar en float16 o en int8 con una escala por fila
+# (cuantizar); los indices los usan asi y solo pasan a float32 un bloque a la
+# vez al puntuar.
+
+import os
+
+import numpy as np
+
+# por debajo de este numero de vectores la busqueda exacta ya es inmediata
+UMBRAL_EXACTO = 5000
+NPROBE = 8
+
+FORMATOS = ("float32", "float16", "int8")
+# filas que se pasan a float32 de una vez al puntuar vectores comprimidos
+BLOQUE = 4096
+
+
+def _normalizar(x):
+    x = np.asarray(x, dtype=np.float32)
+    if x.ndim == 1:
+        x = x[None, :]
+    normas = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(normas > 0, normas, 1)
+
+
+def cuantizar(vecs, formato="float32"):
+    """
+    Devuelve (datos, escala). En int8 cada fila se divide por max|x| / 127 y
+    escala guarda ese factor; en float32/float16 escala es None.
+    """
+    vecs = np.asarray(vecs, dtype=np.float32)
+    if formato == "float32":
+        return vecs, None
+    if formato == "float16":
+        return vecs.astype(np.float16), None
+    if formato == "int8":
+        escala = np.abs(vecs).max(axis=1) / 127
+        escala = np.where(escala > 0, escala, 1).astype(np.float32)
+        datos = np.clip(np.rint(vecs / escala[:, None]), -127, 127).astype(np.int8)
+        return datos, escala
+    raise ValueError(f"Formato de vectores desconocido: {formato!r}")
+
+
+def decuantizar(vecs, escala=None):
+    vecs = np.asarray(vecs).astype(np.float32, copy=False)
+    return vecs if escala is None else vecs * escala[:, None]
+
+
+def _puntuar(consultas, vecs, escala=None):
+    # producto punto consultas x vecs sin materializar vecs entero en float32
+    if vecs.dtype == np.float32 and escala is None:
+        return consultas @ vecs.T
+    out = np.empty((len(consultas), len(vecs)), dtype=np.float32)
+    for i in range(0, len(vecs), BLOQUE):
+        out[:, i:i + BLOQUE] = consultas @ vecs[i:i + BLOQUE].astype(np.float32).T
+    if escala is not None:
+        out *= escala[None, :]
+    return out
+
+
+def _top_k(scores, k):
+    # top-k por fila sin ordenar toda la fila; luego orden descendente
+    k = min(k, scores.shape[1])
+    if k == 0:
+        vacio = np.empty((scores.shape[0], 0))
+        return vacio.astype(np.int64), vacio.astype(np.float32)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    orden = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, orden, axis=1), np.take_along_axis(top_scores, orden, axis=1)
+
+
+class IndiceExacto:
+    tipo = "exacto"
+
+    def __init__(self, vecs, escala=None):
+        self.vecs = np.asarray(vecs)
+        self.escala = escala
+
+    def __len__(self):
+        return len(self.vecs)
+
+    def buscar(self, consultas, k=5):
+        """
+        consultas: (m, d) o (d,). Devuelve (ids, scores), ambos (m, k) y
+        ordenados de mayor a menor similitud.
+        """
+        consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+        return _top_k(_puntuar(consultas, self.vecs, self.escala), k)
+
+    def _arrays(self):
+        return _con_escala({"vecs": self.vecs}, self.escala)
+
+    @classmethod
+    def _desde_arrays(cls, datos):
+        return cls(datos["vecs"], datos.get("escala"))
+
+
+class IndiceIVF:
+    """
+    Indice de archivo invertido (IVF) en NumPy.
+
+    Los vectores se agrupan con k-means esferico en n_listas; cada consulta
+    se compara con los centroides y solo se revisan las nprobe listas mas
+    cercanas. Mas nprobe = mas recall y mas latencia.
+    """
+
+    tipo = "ivf"
+
+    def __init__(self, n_listas=None, nprobe=NPROBE, iteraciones=10, muestra=50_000, semilla=0):
+        self.n_listas = n_listas
+        self.nprobe = nprobe
+        self.iteraciones = iteraciones
+        self.muestra = muestra
+        self.semilla = semilla
+        self.centroides = None
+        self.vecs = None      # vectores ordenados por lista
+        self.escala = None    # escala por fila si vecs esta en int8
+        self.ids = None       # posicion original de cada fila de vecs
+        self.offsets = None   # lista j = vecs[offsets[j]:offsets[j + 1]]
+
+    def __len__(self):
+        return 0 if self.ids is None else len(self.ids)
+
+    def construir(self, vecs, escala=None):
+        # k-means en float32; el indice conserva el formato de vecs
+        datos = np.asarray(vecs)
+        vecs = decuantizar(datos, escala)
+        n = len(vecs)
+        n_listas = self.n_listas or max(1, int(round(4 * np.sqrt(n))))
+        n_listas = min(n_listas, n)
+        rng = np.random.default_rng(self.semilla)
+
+        # k-means sobre una muestra; las asignaciones finales son sobre todo
+        muestra = vecs if n <= self.muestra else vecs[rng.choice(n, self.muestra, replace=False)]
+        centroides = muestra[rng.choice(len(muestra), n_listas, replace=False)].copy()
+        for _ in range(self.iteraciones):
+            asign = np.argmax(muestra @ centroides.T, axis=1)
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, asign, muestra)
+            vacios = np.bincount(asign, minlength=n_listas) == 0
+            # una lista vacia se re-siembra con un vector al azar
+            sumas[vacios] = muestra[rng.choice(len(muestra), int(vacios.sum()))]
+            centroides = _normalizar(sumas)
+
+        asign = np.argmax(vecs @ centroides.T, axis=1)
+        orden = np.argsort(asign, kind="stable")
+        self.centroides = centroides
+        self.vecs = datos[orden]
+        self.escala = None if escala is None else np.asarray(escala)[orden]
+        self.ids = orden.astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(asign, minlength=n_listas))]).astype(np.int64)
+        self.n_listas = n_listas
+        return self
+
+    def buscar(self, consultas, k=5, nprobe=None):
+        consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.n_listas)
+        listas, _ = _top_k(consultas @ self.centroides.T, nprobe)
+
+        ids = np.full((len(consultas), k), -1, dtype=np.int64)
+        scores = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        for i, q in enumerate(consultas):
+            filas = np.concatenate([
+                np.arange(self.offsets[j], self.offsets[j + 1]) for j in listas[i]
+            ])
+            escala = None if self.escala is None else self.escala[filas]
+            top, top_scores = _top_k(_puntuar(q[None, :], self.vecs[filas], escala), k)
+            ids[i, :top.shape[1]] = self.ids[filas[top[0]]]
+            scores[i, :top.shape[1]] = top_scores[0]
+        return ids, scores
+
+    def _arrays(self):
+        return _con_escala({
+            "centroides": self.centroides,
+            "vecs": self.vecs,
+            "ids": self.ids,
+            "offsets": self.offsets,
+            "nprobe": np.int64(self.nprobe),
+        }, self.escala)
+
+    @classmethod
+    def _desde_arrays(cls, datos):
+        indice = cls(n_listas=len(datos["centroides"]), nprobe=int(datos["nprobe"]))
+        indice.centroides = datos["centroides"]
+        indice.vecs = datos["vecs"]
+        indice.escala = datos.get("escala")
+        indice.ids = datos["ids"]
+        indice.offsets = datos["offsets"]
+        return indice
+
+
+def _con_escala(arrays, escala):
+    if escala is not None:
+        arrays["escala"] = escala
+    return arrays
+
+
+TIPOS = {c.tipo: c for c in (IndiceExacto, IndiceIVF)}
+
+
+def construir_indice(vecs, tipo="auto", umbral=UMBRAL_EXACTO, escala=None, **opciones):
+    # "auto": exacto para catalogos chicos, IVF para los grandes
+    if tipo == "auto":
+        tipo = "exacto" if len(vecs) < umbral else "ivf"
+    if tipo == "exacto":
+        return IndiceExacto(vecs, escala)
+    if tipo == "ivf":
+        return IndiceIVF(**opciones).construir(vecs, escala)
+    raise ValueError(f"Tipo de indice desconocido: {tipo!r}")
+
+
+def guardar_indice(indice, path):
+    # se escribe aparte y se renombra: nunca queda un indice a medias
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, tipo=np.array(indice.tipo), **indice._arrays())
+    os.replace(tmp, path)
+
+
+def cargar_indice(path):
+    with np.load(path) as datos:
+        arrays = {k: datos[k] for k in datos.files}
+    return TIPOS[str(arrays.pop("tipo"))]._desde_arrays(arrays)
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import os
-import seaborn as sns
-from core.build_dataset import build_master_dataset
-from core.nlp import cargar_modelo_nlp
+
+from core.agregados import agregados, version_datos
+from core.data_loader import consultar, load_csv
+from core.indice_estudiantes import IndiceEstudiantes
+
+# matplotlib, seaborn y el pipeline de build se importan solo en la rama que
+# los usa (graficos / boton de regenerar)
 
 # configuracion streamlit
 st.set_page_config(page_title="Gestion de Estudiantes", page_icon="👥", layout="wide")
@@ -12,117 +14,153 @@ st.set_page_config(page_title="Gestion de Estudiantes", page_icon="👥", layout
 
 st.subheader("⚙️ Dataset maestro")
 
-if st.button("🔄 Regenerar dataset académico"):
-    with st.spinner("Procesando datos académicos..."):
-        modelo_nlp = cargar_modelo_nlp()
+completo = st.checkbox("Recalcular todos los estudiantes", value=False)
 
-        path = build_master_dataset(
-            anio_academico="2025-2026",
-            semestre=1,
-            modelo_nlp=modelo_nlp
-        )
+# periodos con registros de rendimiento; por defecto el mas reciente
+periodos = (
+    agregados()["rend"][["año_academico", "semestre"]]
+    .dropna().drop_duplicates()
+    .astype({"año_academico": str, "semestre": int})
+    .sort_values(["año_academico", "semestre"])
+    .itertuples(index=False, name=None)
+)
+periodos = list(periodos)
+elegidos = st.multiselect(
+    "Periodos", periodos, default=periodos[-1:], format_func=lambda p: f"{p[0]} - semestre {p[1]}"
+)
 
-    st.success("Dataset generado correctamente")
-    st.code(path)
-    st.rerun()
+if st.button("🔄 Regenerar dataset académico", disabled=not elegidos):
+    from core.build_paralelo import build_many
+
+    barra = st.progress(0.0, text="Procesando datos académicos...")
+    # un build por periodo, en paralelo (core.build_paralelo)
+    resultados = build_many(
+        elegidos,
+        top_k_areas=3,
+        completo=completo,
+        progreso=lambda r: barra.progress(
+            r["hechos"] / r["total"], text=f"{r['anio_academico']} - semestre {r['semestre']} listo"
+        ),
+    )
+
+    fallidos = [r for r in resultados if r["error"]]
+    if fallidos:
+        st.error(f"{len(fallidos)} de {len(resultados)} builds fallaron")
+    else:
+        st.success("Dataset generado correctamente")
+    for r in resultados:
+        if r["error"]:
+            st.error(f"{r['anio_academico']} - semestre {r['semestre']}: {r['error']}")
+            continue
+        reporte = r["reporte"]
+        st.code(r["path"])
+        st.caption(
+            f"{r['segundos']:.1f} s | "
+            f"Estudiantes recalculados: {reporte['sucios']} | "
+            f"reutilizados: {reporte['reutilizados']} | "
+            f"puntajes en cache: {reporte['cache_hits']} | "
+            f"inferencias del modelo: {reporte['inferencias']}"
+        )
+    # con errores no se recarga la pagina: los mensajes quedan a la vista
+    if not fallidos:
+        st.rerun()
 
 # carga y preproceso
-@st.cache_data(show_spinner=False)
-def load_datasets():
-    folder = "datasets"
-    est  = pd.read_csv(os.path.join(folder, "estudiantes.csv"))
-    asig = pd.read_csv(os.path.join(folder, "asignaturas.csv"))
-    rend = pd.read_csv(os.path.join(folder, "rendimiento.csv"))
-    obs  = pd.read_csv(os.path.join(folder, "observaciones.csv"))
+COLUMNAS = ["id_estudiante", "nombre_estudiante", "id_profesor", "aula", "asignatura", "nota"]
+
 
+def armar_registros(rend, est, asig):
     # merge
     df = rend.merge(asig, left_on="asignatura", right_on="nombre_asignatura", how="left")
     df = df.merge(est, on="id_estudiante", how="left")
-    df= df.dropna()
-    # nota final
-    periodos = ["P1", "P2", "P3", "P4"]
-    df["nota"] = df["CF"].copy()
-    if df["nota"].isna().any():
-        df["nota"] = df[periodos].mean(axis=1)
+    columnas = ["id_estudiante", "nombre_estudiante", "aula", "asignatura", "nota"]
+    df = df.dropna(subset=columnas + ["nombre_asignatura"])
 
     df["id_profesor"] = 0
-    return df[["id_estudiante", "nombre_estudiante", "id_profesor", "aula", "asignatura", "nota"]], obs
+    return df[COLUMNAS]
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_datasets(version):
+    # registros con la nota canonica (core.agregados): CF o promedio de parciales,
+    # indexados por estudiante y asignatura (core.indice_estudiantes).
+    # cache_resource: un solo indice compartido por todas las sesiones, sin
+    # copiarlo en cada rerun; es de solo lectura. version (firma de los CSV)
+    # lo regenera cuando cambian los datos
+    ag = agregados()
+    return IndiceEstudiantes(armar_registros(ag["rend"], ag["est"], load_csv("asignaturas.csv")))
+
+def observaciones(sid):
+    # solo las del estudiante (por indice si hay copia en SQLite)
+    return consultar("observaciones.csv", id_estudiante=int(sid))
 
 # logica para obtener estudiantes
-def get_student_by_id(df, sid):
+def get_student_by_id(indice, sid):
     try:
-        res = df[df["id_estudiante"] == int(sid)]
+        res = indice.registros_estudiante(sid)
         return res if not res.empty else None
     except:
         return None
 
-def list_all_students(df, obs):
-    if df.empty:
+def list_all_students(indice):
+    if indice.df.empty:
         st.warning("No hay estudiantes registrados")
         return
-    base = df.drop_duplicates("id_estudiante")[["id_estudiante", "nombre_estudiante", "aula"]]
-    st.dataframe(base, use_container_width=True)
+    st.dataframe(indice.estudiantes, use_container_width=True)
 
     # expandable con observaciones
     st.subheader("📝 Observaciones por estudiante")
-    estudiante = st.selectbox("Seleccione estudiante (lista)", sorted(df["nombre_estudiante"].dropna().astype(str).unique()))
-    sid = df[df["nombre_estudiante"] == estudiante]["id_estudiante"].iloc[0]
-    obs_est = obs[obs["id_estudiante"] == sid]
+    estudiante = st.selectbox("Seleccione estudiante (lista)", indice.nombres)
+    sid = indice.id_por_nombre(estudiante)
+    obs_est = observaciones(sid)
     if not obs_est.empty:
         st.dataframe(obs_est[["fecha", "autor", "observacion"]], use_container_width=True)
     else:
         st.info("Sin observaciones para este estudiante")
 
-def get_students_by_subject(df, subject):
-    return df[df["asignatura"].str.contains(subject, case=False, na=False)]
+def get_students_by_subject(indice, subject):
+    return indice.registros_asignatura(subject)
 
 def students_at_risk(df, threshold=60):
     notas = df["nota"] * 10 if df["nota"].max() <= 10 else df["nota"]
     return df.loc[notas < threshold, "id_estudiante"].tolist()
 
-def get_database_stats(df):
-    if df.empty:
-        return None
-    return dict(total_students=df["id_estudiante"].nunique(),
-                average_score=df["nota"].mean(),
-                highest_score=df["nota"].max(),
-                lowest_score=df["nota"].min(),
-                subjects=df["asignatura"].nunique())
+def get_database_stats(indice):
+    return indice.resumen
 
-def average_by_subject(df, subject):
-    return df.loc[df["asignatura"] == subject, "nota"].mean()
+def average_by_subject(indice, subject):
+    return indice.promedio_asignatura(subject)
 
 # graficos de estudiante
-def plot_student_skills(df, student_id):
-    student = get_student_by_id(df, student_id)
-    if student is None:
+def plot_student_skills(indice, student_id):
+    data = get_student_by_id(indice, student_id)
+    if data is None:
         st.error("Estudiante no encontrado")
         return
-    name = student["nombre_estudiante"].iloc[0]
-    data = df[df["nombre_estudiante"] == name]
+    name = data["nombre_estudiante"].iloc[0]
     if data.empty:
         st.warning("Sin datos")
         return
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(6, 4))
-    data.groupby("asignatura")["nota"].mean().sort_values().plot(kind="barh", ax=ax, color="skyblue")
+    data.groupby("asignatura", observed=True)["nota"].mean().sort_values().plot(kind="barh", ax=ax, color="skyblue")
     ax.set_xlabel("Nota")
     ax.set_title(f"Rendimiento por asignatura – {name}")
     st.pyplot(fig)
 
-def plot_student_dashboard(df, student_id, obs):
-    student = get_student_by_id(df, student_id)
-    if student is None:
+def plot_student_dashboard(indice, student_id):
+    data = get_student_by_id(indice, student_id)
+    if data is None:
         return
-    name = student["nombre_estudiante"].iloc[0]
-    data = df[df["nombre_estudiante"] == name]
+    resumen = indice.resumen_de(student_id)
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("📊 Promedio", f"{data['nota'].mean():.2f}")
-    c2.metric("🏆 Mejor Nota", f"{data['nota'].max():.2f}")
-    c3.metric("📉 Peor Nota", f"{data['nota'].min():.2f}")
-    c4.metric("📚 Asignaturas", data["asignatura"].nunique())
+    c1.metric("📊 Promedio", f"{resumen['nota_promedio']:.2f}")
+    c2.metric("🏆 Mejor Nota", f"{resumen['nota_max']:.2f}")
+    c3.metric("📉 Peor Nota", f"{resumen['nota_min']:.2f}")
+    c4.metric("📚 Asignaturas", int(resumen["asignaturas"]))
 
     # observaciones
-    obs_est = obs[obs["id_estudiante"] == student_id]
+    obs_est = observaciones(student_id)
     if not obs_est.empty:
         with st.expander("📝 Ver observaciones"):
             st.dataframe(obs_est[["fecha", "autor", "observacion"]], use_container_width=True)
@@ -133,50 +171,49 @@ def plot_student_dashboard(df, student_id, obs):
     st.dataframe(data[["asignatura", "nota"]].sort_values("nota", ascending=False))
 
 # sidebar para submodulos de estudiantes
-df, obs = load_datasets()
+indice = load_datasets(version_datos())
 
 option = st.sidebar.radio("📚 Listar:", ["📋 Ver todos", "📖 Por asignatura", "📊 Estadisticas"])
 
 if option == "📋 Ver todos":
     st.header("📋 Lista de estudiantes")
-    list_all_students(df, obs)
+    list_all_students(indice)
 
 elif option == "📖 Por asignatura":
     st.header("📖 Estudiantes por asignatura")
-    subjects = sorted(df["asignatura"].dropna().astype(str).unique())
-    subject = st.selectbox("Asignatura", subjects)
-    tmp = get_students_by_subject(df, subject)
-    st.dataframe(tmp.drop_duplicates("id_estudiante")[["id_estudiante", "nombre_estudiante", "aula"]])
-    st.metric(f"📊 Promedio en {subject}", f"{average_by_subject(df, subject):.2f}")
+    subject = st.selectbox("Asignatura", indice.asignaturas)
+    st.dataframe(indice.estudiantes_asignatura(subject))
+    st.metric(f"📊 Promedio en {subject}", f"{average_by_subject(indice, subject):.2f}")
 
 elif option == "📊 Estadisticas":
     st.header("📊 Estadisticas Generales")
-    stats = get_database_stats(df)
+    stats = get_database_stats(indice)
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("📚 Total estudiantes", stats["total_students"])
     c2.metric("📈 Promedio general", f"{stats['average_score']:.2f}")
     c3.metric("🏆 Nota max", f"{stats['highest_score']:.2f}")
     c4.metric("📉 Nota min", f"{stats['lowest_score']:.2f}")
     st.subheader("📊 Distribucion de notas")
-    
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     sns.set_theme(
     style="whitegrid",
     context="talk",
     palette="Set2"
 )
     fig, ax = plt.subplots(figsize=(6, 3))
-    df["nota"].plot(kind="hist", bins=15, ax=ax, color="steelblue", alpha=.7)
+    indice.df["nota"].plot(kind="hist", bins=15, ax=ax, color="steelblue", alpha=.7)
     st.pyplot(fig)
     
     st.header("📈 Graficos Individuales")
-    names = sorted(df["nombre_estudiante"].dropna().astype(str).unique())
-    name = st.selectbox("Estudiante", names)
-    sid = df[df["nombre_estudiante"] == name]["id_estudiante"].iloc[0]
+    name = st.selectbox("Estudiante", indice.nombres)
+    sid = indice.id_por_nombre(name)
     tipo = st.radio("Tipo", ["📊 Barras por asignatura", "🎯 Dashboard completo"])
     if tipo == "📊 Barras por asignatura":
-        plot_student_skills(df, sid)
+        plot_student_skills(indice, sid)
     else:
-        plot_student_dashboard(df, sid, obs)
+        plot_student_dashboard(indice, sid)
 
 st.markdown("---")
 st.caption("📊 Sistema de Gestion Estudiantil | Dataset 2025")
\ No newline at end of file
@@ -2,6 +2,7 @@
 import streamlit as st
 import pandas as pd
 import os
+from core.contexto_store import estadisticas, guardar_contexto
 from core.form_utils import calcular_riesgo_desde_form
 
 st.set_page_config(page_title="Formulario Contexto", page_icon="🎓", layout="wide")
@@ -360,18 +361,8 @@ with st.form("context_form"):
 
         F = calcular_riesgo_desde_form(form_dict)
 
-        # guardamos csv
-        light = {
-            "id_estudiante": estudiante_seleccionado.id_estudiante,
-            "CS": F,
-        }
-        csv_path = os.path.join("datasets", "contexto_formulario.csv")
-        os.makedirs("datasets", exist_ok=True)
-        csv_path = os.path.join("datasets", "contexto_formulario.csv")
-        df = pd.read_csv(csv_path) if os.path.exists(csv_path) else pd.DataFrame(columns=["id_estudiante", "CS"])
-        df = df[df["id_estudiante"] != estudiante_seleccionado.id_estudiante]
-        df = pd.concat([df, pd.DataFrame([{"id_estudiante": estudiante_seleccionado.id_estudiante, "CS": F}])], ignore_index=True)
-        df.to_csv(csv_path, index=False)
+        # upsert del formulario del estudiante (core.contexto_store)
+        guardar_contexto(estudiante_seleccionado.id_estudiante, F)
 
         st.success(f"✅ Score de contexto (CS) guardado: **{F:.2f}**")
         st.balloons()
@@ -381,7 +372,6 @@ with st.form("context_form"):
 st.sidebar.title("ℹ️ Informacion")
 st.sidebar.info("Formulario de contexto para estimar ambiente (F).")
 st.sidebar.title("📊 Estadisticas")
-csv_stats = "datasets/contexto_formulario.csv"
 if estudiante_seleccionado is not None:
     st.sidebar.subheader("👤 Estudiante seleccionado")
     st.sidebar.write(f"**ID:** {estudiante_seleccionado.id_estudiante}")
@@ -390,9 +380,7 @@ if estudiante_seleccionado is not None:
     st.sidebar.write(f"**Genero:** {estudiante_seleccionado.genero}")
     st.sidebar.write(f"**Estado:** {estudiante_seleccionado.estado_academico}")
 
-if os.path.exists(csv_stats):
-    df_stats = pd.read_csv(csv_stats)
-    st.sidebar.metric("Total de formularios", len(df_stats))
-    st.sidebar.metric("F promedio", f"{df_stats['CS'].mean():.2f}")
-else:
-    st.sidebar.metric("Total de formularios", 0)
\ No newline at end of file
+stats = estadisticas()
+st.sidebar.metric("Total de formularios", stats["formularios"])
+if stats["cs_promedio"] is not None:
+    st.sidebar.metric("F promedio", f"{stats['cs_promedio']:.2f}")
@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
 from core.data_loader import load_master, load_areas
 from core.perfil_textual import generar_perfil_textual, generar_descripcion_final
-from core.semantic_matcher import recomendar_areas
+from core.semantic_matcher import recomendar_areas_estudiante, preparar_areas
 
 # CONFIG STREAMLIT
 
@@ -21,12 +20,7 @@ st.caption("Basado en perfil academico, contexto social y observaciones")
 # CARGA DE DATOS
 
 df = load_master()
-areas = load_areas()
-
-areas["texto_area"] = (
-    areas["nombre_area"].astype(str) + ". " +
-    areas["descripcion"].astype(str)
-)
+areas = preparar_areas(load_areas())
 
 # SELECCIoN ESTUDIANTE
 
@@ -64,7 +58,8 @@ with st.expander("🧠 Ver perfil técnico del estudiante"):
 
 st.subheader("🎯 Areas academicas recomendadas")
 
-ranking = recomendar_areas(perfil_texto, areas)
+# perfil estructurado + observaciones codificadas una vez cada una
+ranking = recomendar_areas_estudiante(row, areas)
 
 top = ranking.head(3)
 
@@ -90,25 +85,32 @@ st.write("### 🧭 Distribucion de afinidad")
 labels = tabla["nombre_area"].tolist()
 values = tabla["afinidad"].tolist()
 
-angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False)
-values_c = values + values[:1]
-angles_c = np.concatenate([angles, [angles[0]]])
+def grafico_radial(labels, values):
+    # matplotlib se importa recien al graficar
+    import matplotlib.pyplot as plt
+
+    angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False)
+    values_c = values + values[:1]
+    angles_c = np.concatenate([angles, [angles[0]]])
+
+    fig = plt.figure(figsize=(2.6, 2.6))
+    ax = fig.add_subplot(111, polar=True)
+
+    ax.plot(angles_c, values_c, linewidth=1.2)
+    ax.fill(angles_c, values_c, alpha=0.25)
 
-fig = plt.figure(figsize=(2.6, 2.6))
-ax = fig.add_subplot(111, polar=True)
+    ax.set_xticks(angles)
+    ax.set_xticklabels(labels, fontsize=7)
 
-ax.plot(angles_c, values_c, linewidth=1.2)
-ax.fill(angles_c, values_c, alpha=0.25)
+    ax.set_yticklabels([])
+    ax.set_ylim(0, 1)
+    ax.grid(alpha=0.3)
+    ax.spines["polar"].set_visible(False)
 
-ax.set_xticks(angles)
-ax.set_xticklabels(labels, fontsize=7)
+    return fig
 
-ax.set_yticklabels([])
-ax.set_ylim(0, 1)
-ax.grid(alpha=0.3)
-ax.spines["polar"].set_visible(False)
 
-st.pyplot(fig)
+st.pyplot(grafico_radial(labels, values))
 
 # OBSERVACIONES
 
@@ -121,6 +123,22 @@ if isinstance(row["observaciones"], str) and len(row["observaciones"]) > 0:
 else:
     st.info("Este estudiante no tiene observaciones registradas.")
 
+# FILTRO POR AREA (usa las recomendaciones precalculadas del master)
+
+if "area_1" in df.columns:
+    st.subheader("🏫 Estudiantes por área recomendada")
+
+    # opciones de todas las posiciones: un area puede salir solo como 2da o 3ra
+    cols_area = [c for c in df.columns if c.startswith("area_")]
+    areas = pd.unique(df[cols_area].to_numpy().ravel())
+    area_sel = st.selectbox("Área", sorted(a for a in areas if pd.notna(a)))
+    en_area = df[df[cols_area].eq(area_sel).any(axis=1)]
+
+    st.dataframe(
+        en_area[["id_estudiante", "nombre_estudiante"] + cols_area],
+        use_container_width=True
+    )
+
 # INFORME FINAL
 
 st.subheader("📋 Informe final del estudiante")
@@ -1,12 +1,12 @@
-import os
+import time
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
-from core.data_loader import load_base_data
-from core.nlp import cargar_modelo_nlp, MODEL_PATH
-from core.models_riesgo import calcular_riesgo
+from core.agregados import agregados
+from core.contexto_store import leer_contexto
+from core.nlp import cargar_modelo_nlp, reentrenar_en_segundo_plano, estado_reentrenamiento
+from core.score_cache import CachePuntajes
+from core.models_riesgo import calcular_riesgo_frame
 
 
 # config streamlit
@@ -23,38 +23,25 @@ st.caption("Factores academicos + análisis de observaciones (NLP)")
 # carga de datos
 @st.cache_data
 def load_riesgo_data():
-    data = load_base_data()
+    # agregados compartidos con las demas paginas y el build
+    ag = agregados()
 
-    est = data["est"]
-    rend = data["rend"]
-    obs = data["obs"]
+    est = ag["est"]
 
-    # nota promedio
-    periodos = ["P1", "P2", "P3", "P4"]
-    rend["nota"] = rend["CF"].fillna(rend[periodos].mean(axis=1))
-    notas = rend.groupby("id_estudiante")["nota"].mean().reset_index(name="nota_promedio")
-
-    # asistencia
-    asist = rend.groupby("id_estudiante")["asistencia"].mean().reset_index(name="asistencia")
+    # nota promedio y asistencia
+    notas = ag["por_estudiante"][["id_estudiante", "nota_promedio", "asistencia"]]
 
     # observaciones
-    obs_est = (
-        obs.groupby("id_estudiante")["observacion"]
-        .apply(lambda x: " | ".join(x))
-        .reset_index(name="observaciones")
-    )
+    obs_est = ag["observaciones"].assign(
+        observaciones=lambda d: d["observacion"].apply(" | ".join)
+    )[["id_estudiante", "observaciones"]]
     
     # contexto formulario
-    csv_path = os.path.join("datasets", "contexto_formulario.csv")
-    if os.path.exists(csv_path):
-        df_cs = pd.read_csv(csv_path)
-    else:
-        df_cs = pd.DataFrame(columns=["id_estudiante", "CS"])
+    df_cs = leer_contexto()[["id_estudiante", "CS"]]
 
     # merge
     df = (
         est.merge(notas, on="id_estudiante", how="left")
-           .merge(asist, on="id_estudiante", how="left")
            .merge(obs_est, on="id_estudiante", how="left")
            .merge(df_cs, on="id_estudiante", how="left")
     )
@@ -71,10 +58,14 @@ modelo_nlp = cargar_modelo_nlp()
 def calcular_riesgos(df, modelo_nlp):
     df = df.copy()
 
-    df[["Rd", "F"]] = df.apply(
-        lambda row: pd.Series(calcular_riesgo(row, modelo_nlp)),
-        axis=1
-    )
+    # todas las observaciones en un solo lote; solo se infieren las no vistas
+    cache = CachePuntajes()
+    df["F"] = cache.puntajes(df["observaciones"], modelo_nlp)
+    cache.guardar()
+
+    riesgo = calcular_riesgo_frame(df)
+    df["Rd"] = riesgo["Rd"]
+    df["F"] = riesgo["F"]
 
     return df.sort_values("Rd", ascending=False).reset_index(drop=True)
 
@@ -89,29 +80,42 @@ c1.metric("Total estudiantes", len(df_riesgo))
 c2.metric("Riesgo promedio", f"{df_riesgo['Rd'].mean():.1%}")
 c3.metric("Alto riesgo (Rd > 0.6)", (df_riesgo["Rd"] > 0.6).sum())
 
-# Boton de re-entrenamiento
-if st.button("🔄 Re-entrenar modelo"):
-    if os.path.exists(MODEL_PATH):
-        os.remove(MODEL_PATH)
-    st.cache_resource.clear()           # borra el cache de @st.cache_resource
-    modelo_nlp = cargar_modelo_nlp()    # vuelve a entrenar
-    st.success("Modelo re-entrenado con los datos actuales.")
-    st.rerun()                          # recarga la página con los nuevos valores
+# Boton de re-entrenamiento (en segundo plano; se sigue usando el modelo activo)
+estado = estado_reentrenamiento()
+entrenando = estado["estado"] == "en_curso"
+
+if st.button("🔄 Re-entrenar modelo", disabled=entrenando):
+    reentrenar_en_segundo_plano()
+    st.rerun()
+
+if entrenando:
+    st.info(
+        f"⏳ Re-entrenando el modelo en segundo plano (desde {estado['inicio']}). "
+        "Mientras tanto se usa el modelo actual."
+    )
+elif estado["estado"] == "terminado":
+    st.caption(f"Modelo activo: {estado['version']} (entrenado {estado['fin']})")
+elif estado["estado"] in ("error", "interrumpido"):
+    st.error(f"El último re-entrenamiento no terminó: {estado.get('error', estado['estado'])}")
 
 
 # grafico top riesgo
 
 st.subheader("📊 Estudiantes con mayor riesgo")
 
-top = df_riesgo.head(5)
+def grafico_top_riesgo(top):
+    # matplotlib se importa recien al graficar
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.barh(top["nombre_estudiante"], top["Rd"])
+    ax.set_xlabel("Riesgo de desercion (Rd)")
+    ax.set_title("Top 5 estudiantes con mayor riesgo")
+    ax.invert_yaxis()
+    return fig
 
-fig, ax = plt.subplots(figsize=(8, 4))
-ax.barh(top["nombre_estudiante"], top["Rd"])
-ax.set_xlabel("Riesgo de desercion (Rd)")
-ax.set_title("Top 5 estudiantes con mayor riesgo")
-ax.invert_yaxis()
 
-st.pyplot(fig)
+st.pyplot(grafico_top_riesgo(df_riesgo.head(5)))
 
 
 # tabla con detalles
@@ -180,3 +184,9 @@ st.caption(
     "Con formulario: Rd = 0.25·(1-A) + 0.25·max(0,75-N)/100 + 0.25·(1-F) + 0.25·(1-CS) | "
     "Sin formulario: Rd = ⅓·(1-A) + ⅓·max(0,75-N)/100 + ⅓·(1-F)"
 )
+
+
+# mientras hay un re-entrenamiento en curso la pagina consulta su estado
+if entrenando:
+    time.sleep(3)
+    st.rerun()